@@ -0,0 +1,104 @@
+"""Benchmark fixtures, and the results store compared against benchmarks/baseline.json after each run."""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+BENCHMARKS = Path(__file__).resolve().parent
+BASELINE = BENCHMARKS / "baseline.json"
+LATEST = BENCHMARKS / "results" / "latest.json"
+
+def pytest_addoption(parser):
+    group = parser.getgroup("crafty benchmarks")
+    group.addoption("--fleet-sizes", default="10,100,1000", help="Comma separated numbers of servers (and users) to generate")
+    group.addoption("--load-sizes", default="100", help="Comma separated numbers of servers the simulator serves in the HTTP load scenarios")
+    group.addoption("--save-baseline", action="store_true", help="Store the metrics of this run in benchmarks/baseline.json")
+    group.addoption("--tolerance", type=float, default=0.25, help="Relative slowdown reported as a regression")
+    group.addoption("--fail-on-regression", action="store_true", help="Fail the run when a metric regressed")
+
+def pytest_generate_tests(metafunc):
+    if "fleet_size" in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption("--fleet-sizes").split(",") if size]
+        metafunc.parametrize("fleet_size", sizes, ids=[f'{size}' for size in sizes])
+    if "load_size" in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption("--load-sizes").split(",") if size]
+        metafunc.parametrize("load_size", sizes, ids=[f'{size}' for size in sizes])
+
+class Results():
+    """Metrics of one run, lower is better for all of them."""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, float] = {}
+
+    def record(self, name: str, value: float) -> None:
+        self.metrics[name] = value
+
+    def compare(self, baseline: dict[str, float], tolerance: float) -> list[tuple[str, float, float | None, str]]:
+        rows = []
+        for name, value in sorted(self.metrics.items()):
+            base = baseline.get(name)
+            if not base:
+                rows.append((name, value, base, "new"))
+            elif value > base * (1 + tolerance):
+                rows.append((name, value, base, "REGRESSED"))
+            elif value < base * (1 - tolerance):
+                rows.append((name, value, base, "improved"))
+            else:
+                rows.append((name, value, base, ""))
+        return rows
+
+RESULTS = Results()
+
+@pytest.fixture
+def results() -> Results:
+    return RESULTS
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+@pytest.fixture(autouse=True)
+def enable_event_loop_debug(event_loop) -> None:
+    """Keep the event loop out of debug mode, which the Home Assistant fixtures turn on.
+
+    Debug mode records a traceback for every handle created, which would dominate the timings.
+    """
+    event_loop.set_debug(False)
+
+@pytest.fixture
+def expected_lingering_timers() -> bool:
+    # Long runs at the larger sizes occasionally end next to a pending timer, report it as a warning instead of failing the timings
+    return True
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if not RESULTS.metrics:
+        return
+    LATEST.parent.mkdir(exist_ok=True)
+    LATEST.write_text(json.dumps(RESULTS.metrics, indent=2, sort_keys=True))
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    if config.getoption("--save-baseline"):
+        # Running a subset only replaces the metrics it measured
+        baseline.update(RESULTS.metrics)
+        BASELINE.write_text(json.dumps(baseline, indent=2, sort_keys=True))
+
+    config._crafty_rows = RESULTS.compare(baseline, config.getoption("--tolerance"))
+    if config.getoption("--fail-on-regression") and any(status == "REGRESSED" for *_, status in config._crafty_rows):
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    rows = getattr(config, "_crafty_rows", None)
+    if rows is None:
+        return
+    terminalreporter.section("crafty benchmarks")
+    for name, value, base, status in rows:
+        change = f'{(value / base - 1) * 100:+7.1f}%' if base else "        "
+        terminalreporter.write_line(f'{name:<55} {value:>14.6g} {change} {status}')
+    if config.getoption("--save-baseline"):
+        terminalreporter.write_line(f'Saved baseline to {BASELINE}')
@@ -0,0 +1,131 @@
+"""Synthetic Crafty fleet answering like CraftyClient, without any network."""
+import asyncio
+import random
+from datetime import timedelta
+from typing import Any
+
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.crafty_controller.actions import CraftyActionQueue
+from custom_components.crafty_controller.const import DOMAIN
+from custom_components.crafty_controller.coordinator import CraftyDataCoordinator, CraftyStatsCoordinator, CraftyEntryData
+from custom_components.crafty_controller.entity import CraftyEntryNames
+from custom_components.crafty_controller.metrics import CraftyMetrics
+from custom_components.crafty_controller.models import CraftySelection
+from custom_components.crafty_controller.pictures import CraftyPictureCache
+
+# 1x1 transparent png
+PICTURE = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+class FakeCrafty():
+    """Servers, roles and users generated from a seed, every stats call moves the live values a little."""
+
+    def __init__(self, servers: int, roles: int | None = None, users: int | None = None, seed: int = 0) -> None:
+        self.random = random.Random(seed)
+        self.n_servers = servers
+        self.n_roles = max(1, servers // 10) if roles is None else roles
+        self.n_users = servers if users is None else users
+        self.base_url = "http://crafty.invalid:8443"
+        self.token = "token"
+        self.calls = 0
+        self.metrics = CraftyMetrics()
+        self.running = {f'server-{i}': i % 3 != 0 for i in range(self.n_servers)}
+
+    def _server_ids(self, start: int, count: int) -> list[str]:
+        return [f'server-{(start + i) % self.n_servers}' for i in range(min(count, self.n_servers))]
+
+    def _user_ids(self, start: int, count: int) -> list[int]:
+        return [1 + (start + i) % self.n_users for i in range(min(count, self.n_users))]
+
+    async def _answer(self, value: Any) -> Any:
+        self.calls += 1
+        await asyncio.sleep(0)
+        return value
+
+    async def login(self) -> None:
+        await self._answer(None)
+
+    async def servers(self) -> list:
+        return await self._answer([{"server_id": f'server-{i}', "server_name": f'Server {i}', "created": "2024-01-01 10:00:00"} for i in range(self.n_servers)])
+
+    async def server_stats(self, id: str) -> dict[str, Any]:
+        return await self._answer({
+            "server_id": {"server_id": id, "server_name": f'Server {id.split("-")[1]}'},
+            "running": self.running[id],
+            "cpu": round(self.random.uniform(0, 100), 2),
+            "mem": f'{self.random.uniform(0.5, 8):.1f}GB',
+            "mem_percent": round(self.random.uniform(0, 100), 1),
+            "world_size": f'{self.random.uniform(100, 900):.1f}MB',
+            "online": self.random.randint(0, 20) if self.running[id] else 0,
+            "max": 20,
+            "version": "1.20.4",
+        })
+
+    async def server_accesses(self, id: str) -> list:
+        return await self._answer([{"user_id": user_id} for user_id in self._user_ids(int(id.split("-")[1]), 3)])
+
+    async def server_webhooks(self, id: str) -> list:
+        return await self._answer([])
+
+    async def server_action(self, id: str, action) -> bool:
+        self.running[id] = action.value in ("start_server", "restart_server")
+        return await self._answer(True)
+
+    async def roles(self) -> list:
+        return await self._answer([{"role_id": i, "role_name": f'Role {i}', "manager": 1} for i in range(1, self.n_roles + 1)])
+
+    async def role_servers(self, id: int) -> list:
+        return await self._answer([{"server_id": server_id, "permissions": f'{id * 37 % 256:08b}'} for server_id in self._server_ids(id * 10, 10)])
+
+    async def role_users(self, id: int) -> list:
+        return await self._answer(self._user_ids(id * 10, 10))
+
+    async def users(self) -> list:
+        return await self._answer([{"user_id": i, "username": f'user{i}'} for i in range(1, self.n_users + 1)])
+
+    async def user(self, id: int) -> dict[str, Any]:
+        return await self._answer({
+            "user_id": id,
+            "username": f'user{id}',
+            "created": "2024-01-01T10:00:00",
+            "last_login": "2024-02-01T10:00:00",
+            "last_update": "2024-02-01T10:00:00",
+            "last_ip": f'10.0.{id // 256 % 256}.{id % 256}',
+            "email": f'user{id}@example.com',
+            "enabled": True,
+            "superuser": id == 1,
+            "roles": [{"role_id": 1 + id % self.n_roles}],
+        })
+
+    async def user_picture(self, id: int) -> str | None:
+        # Most users keep the default picture, like on a real panel
+        return await self._answer(f'{self.base_url}/static/assets/images/{"default" if id % 10 else id}.png')
+
+    async def download(self, url: str, etag: str | None = None) -> tuple[bytes | None, str | None, str | None]:
+        if etag == url:
+            return await self._answer((None, None, etag))
+        return await self._answer((PICTURE, "image/png", url))
+
+async def async_setup_fleet(hass: HomeAssistant, client: Any, concurrency: int = 8) -> tuple[MockConfigEntry, CraftyEntryData]:
+    """Set up both coordinators of a config entry against the fake fleet (or a CraftyClient of the simulator), as async_setup_entry does."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"name": "", "username": "u", "password": "p", "host": "crafty.invalid", "port": 8443, "ssl": False, "verify_ssl": True})
+    entry.add_to_hass(hass)
+    # Coordinators pick up their config entry from the context, follow-up polling runs as its background tasks
+    config_entries.current_entry.set(entry)
+    semaphore = asyncio.Semaphore(concurrency)
+    selection = CraftySelection()
+    pictures = CraftyPictureCache(hass, client, entry.entry_id)
+    await pictures.async_load()
+    coordinator = CraftyDataCoordinator(hass, client, semaphore, pictures, timedelta(seconds=600), timedelta(seconds=1800), selection)
+    stats_coordinator = CraftyStatsCoordinator(hass, client, semaphore, coordinator, selection=selection)
+    await coordinator.async_refresh()
+    await stats_coordinator.async_refresh()
+    actions = CraftyActionQueue(hass, entry, client, stats_coordinator)
+    data = CraftyEntryData(client, coordinator, stats_coordinator, pictures, selection, names=CraftyEntryNames(entry), actions=actions)
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = data
+    return entry, data
@@ -0,0 +1,45 @@
+"""Timing and memory helpers, every metric keeps the best of its rounds to damp scheduler noise."""
+import gc
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+def rounds_for(fleet_size: int) -> int:
+    return 3 if fleet_size >= 1000 else 10
+
+async def async_measure(func: Callable[[], Awaitable[Any]], rounds: int, teardown: Callable[[], Any] | None = None) -> tuple[float, float]:
+    """Best (wall, cpu) seconds of awaiting func, teardown runs untimed after every round."""
+    walls, cpus = [], []
+    for _ in range(rounds):
+        wall, cpu = time.perf_counter(), time.process_time()
+        await func()
+        walls.append(time.perf_counter() - wall)
+        cpus.append(time.process_time() - cpu)
+        if teardown is not None:
+            teardown()
+    return (min(walls), min(cpus))
+
+def measure(func: Callable[[], Any], rounds: int) -> tuple[float, float]:
+    """Best (wall, cpu) seconds of calling func."""
+    walls, cpus = [], []
+    for _ in range(rounds):
+        wall, cpu = time.perf_counter(), time.process_time()
+        func()
+        walls.append(time.perf_counter() - wall)
+        cpus.append(time.process_time() - cpu)
+    return (min(walls), min(cpus))
+
+async def async_retained(func: Callable[[], Awaitable[Any]]) -> int:
+    """Bytes still allocated while the result of func is alive, compared with after it is dropped."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = await func()
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0]
+        del result
+        gc.collect()
+        return held - tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
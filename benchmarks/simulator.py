@@ -0,0 +1,306 @@
+"""Crafty API v2 served over HTTP from a FakeCrafty fleet, with per-endpoint latency, padding, errors and rate limits,
+and the dashboard websocket pushing server stats.
+
+Runs inside the benchmarks against the real CraftyClient, or standalone so a Home Assistant instance can be pointed at it:
+
+    python simulator.py --servers 500 --port 8443 --profiles profiles.json
+
+where profiles.json maps endpoint names (see ENDPOINTS, "*" for all of them) to EndpointProfile fields.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any
+
+from aiohttp import web
+
+from crafty_controller_api import ServerActions
+
+# The fleet imports the integration when run standalone
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fleet import PICTURE, FakeCrafty
+
+TOKEN = "simulated-token"
+
+# Named after the CraftyClient method calling them
+ENDPOINTS = [
+    "login",
+    "servers",
+    "server_stats",
+    "server_accesses",
+    "server_webhooks",
+    "server_action",
+    "roles",
+    "role_servers",
+    "role_users",
+    "users",
+    "user",
+    "user_picture",
+    "download",
+    "websocket",
+]
+
+@dataclass
+class EndpointProfile:
+    """How an endpoint misbehaves: seconds of latency (plus up to jitter), bytes of padding per answer,
+    share of requests failing with HTTP 500, and a token bucket of rate requests per second (burst deep) answering 429."""
+    latency: float = 0
+    jitter: float = 0
+    padding: int = 0
+    error_rate: float = 0
+    rate: float | None = None
+    burst: int = 1
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    errors: int = 0
+    limited: int = 0
+    bytes: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    tokens: float = 0
+    refilled: float = field(default_factory=time.monotonic)
+
+class CraftySimulator():
+    """Serves a FakeCrafty fleet, profiles are looked up by endpoint name and fall back to "*"."""
+
+    def __init__(self, fleet: FakeCrafty, profiles: dict[str, EndpointProfile] | None = None, action_delay: float = 0, seed: int = 0) -> None:
+        self.fleet = fleet
+        self.profiles = profiles or {}
+        # Seconds a server takes to reach its new running state after an action
+        self.action_delay = action_delay
+        self.random = random.Random(seed)
+        self.stats = {name: EndpointStats() for name in ENDPOINTS}
+        self.connections: set[tuple] = set()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.token = TOKEN
+        self.url: str | None = None
+        # Open dashboard websockets, and the status handshakes are refused with while set
+        self.websockets: set[web.WebSocketResponse] = set()
+        self.websocket_status: int | None = None
+        self.websocket_attempts: list[float] = []
+        self._runner: web.AppRunner | None = None
+
+        self.app = web.Application()
+        self.app.add_routes([
+            web.post("/api/v2/auth/login", self._endpoint("login", self._login, auth=False)),
+            web.get("/api/v2/servers", self._endpoint("servers", lambda request: self.fleet.servers())),
+            web.get("/api/v2/servers/{id}/stats", self._endpoint("server_stats", lambda request: self.fleet.server_stats(self._server(request)))),
+            web.get("/api/v2/servers/{id}/users", self._endpoint("server_accesses", lambda request: self.fleet.server_accesses(self._server(request)))),
+            web.get("/api/v2/servers/{id}/webhook", self._endpoint("server_webhooks", lambda request: self.fleet.server_webhooks(self._server(request)))),
+            web.post("/api/v2/servers/{id}/action/{action}", self._endpoint("server_action", self._server_action)),
+            web.get("/api/v2/roles", self._endpoint("roles", lambda request: self.fleet.roles())),
+            web.get("/api/v2/roles/{id}/servers", self._endpoint("role_servers", lambda request: self.fleet.role_servers(self._id(request, self.fleet.n_roles)))),
+            web.get("/api/v2/roles/{id}/users", self._endpoint("role_users", lambda request: self.fleet.role_users(self._id(request, self.fleet.n_roles)))),
+            web.get("/api/v2/users", self._endpoint("users", lambda request: self.fleet.users())),
+            web.get("/api/v2/users/{id}", self._endpoint("user", lambda request: self.fleet.user(self._id(request, self.fleet.n_users)))),
+            web.get("/api/v2/users/{id}/pfp", self._endpoint("user_picture", lambda request: self.fleet.user_picture(self._id(request, self.fleet.n_users)))),
+            web.get("/static/assets/images/{name}", self._endpoint("download", self._picture, auth=False, raw=True)),
+            web.get("/ws", self._websocket),
+        ])
+
+    def profile(self, name: str) -> EndpointProfile:
+        return self.profiles.get(name) or self.profiles.get("*") or EndpointProfile()
+
+    @property
+    def requests(self) -> int:
+        return sum(stats.requests for stats in self.stats.values())
+
+    def reset_stats(self) -> None:
+        self.stats = {name: EndpointStats() for name in ENDPOINTS}
+        self.connections.clear()
+        self.peak_in_flight = 0
+        self.websocket_attempts.clear()
+
+    def expire_token(self) -> None:
+        """Reject the current token, as Crafty does after a restart."""
+        self.token = f'{TOKEN}-{self.random.random()}'
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f'http://{host}:{port}'
+        # Picture urls handed out by the fleet point back at the simulator
+        self.fleet.base_url = self.url
+        return self.url
+
+    async def async_stop(self) -> None:
+        await self.drop_websockets()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def push(self, event: str, data: Any) -> None:
+        """Send a frame to every open dashboard websocket, as the Crafty panel does."""
+        frame = json.dumps({"event": event, "data": data})
+        self.stats["websocket"].bytes += len(frame) * len(self.websockets)
+        await asyncio.gather(*(ws.send_str(frame) for ws in list(self.websockets)))
+
+    async def push_status(self, ids: list[str] | None = None) -> None:
+        """Push the stats of some (by default all) servers in one update_server_status frame."""
+        ids = list(self.fleet.running) if ids is None else ids
+        await self.push("update_server_status", [{"id": id, **await self.fleet.server_stats(id)} for id in ids])
+
+    async def push_details(self, id: str) -> None:
+        await self.push("update_server_details", {"id": id, **await self.fleet.server_stats(id)})
+
+    async def drop_websockets(self) -> None:
+        await asyncio.gather(*(ws.close() for ws in list(self.websockets)))
+
+    @staticmethod
+    def _id(request: web.Request, count: int) -> int:
+        id = int(request.match_info["id"])
+        if not 1 <= id <= count:
+            raise web.HTTPNotFound(text=json.dumps({"status": "error", "error": "NOT_FOUND"}), content_type="application/json")
+        return id
+
+    def _server(self, request: web.Request) -> str:
+        id = request.match_info["id"]
+        if id not in self.fleet.running:
+            raise web.HTTPNotFound(text=json.dumps({"status": "error", "error": "NOT_FOUND"}), content_type="application/json")
+        return id
+
+    async def _login(self, request: web.Request) -> dict[str, Any]:
+        body = await request.json()
+        if not body.get("username") or not body.get("password"):
+            raise web.HTTPForbidden(text=json.dumps({"status": "error", "error": "INCORRECT_CREDENTIALS"}), content_type="application/json")
+        await self.fleet.login()
+        return {"token": self.token, "user_id": "1"}
+
+    async def _server_action(self, request: web.Request) -> Any:
+        id = self._server(request)
+        try:
+            action = ServerActions(request.match_info["action"])
+        except ValueError:
+            raise web.HTTPBadRequest(text=json.dumps({"status": "error", "error": "INVALID_ACTION"}), content_type="application/json")
+        if not self.action_delay:
+            return await self.fleet.server_action(id, action)
+        # The server keeps its state until the action completes
+        running = self.fleet.running[id]
+        result = await self.fleet.server_action(id, action)
+        settled = self.fleet.running[id]
+        self.fleet.running[id] = running
+        asyncio.get_running_loop().call_later(self.action_delay, self.fleet.running.__setitem__, id, settled)
+        return result
+
+    async def _picture(self, request: web.Request) -> web.Response:
+        etag = f'"{request.match_info["name"]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304)
+        return web.Response(body=PICTURE, content_type="image/png", headers={"ETag": etag})
+
+    async def _websocket(self, request: web.Request) -> web.StreamResponse:
+        stats = self.stats["websocket"]
+        stats.requests += 1
+        self.websocket_attempts.append(time.monotonic())
+        if self.websocket_status is not None:
+            stats.errors += 1
+            return web.Response(status=self.websocket_status)
+        if request.cookies.get("token") != self.token:
+            return web.Response(status=403)
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.websockets.add(ws)
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            self.websockets.discard(ws)
+        return ws
+
+    def _limited(self, stats: EndpointStats, profile: EndpointProfile) -> bool:
+        if profile.rate is None:
+            return False
+        now = time.monotonic()
+        stats.tokens = min(profile.burst, stats.tokens + (now - stats.refilled) * profile.rate)
+        stats.refilled = now
+        if stats.tokens < 1:
+            return True
+        stats.tokens -= 1
+        return False
+
+    def _endpoint(self, name: str, handler, auth: bool = True, raw: bool = False):
+        async def endpoint(request: web.Request) -> web.Response:
+            profile = self.profile(name)
+            stats = self.stats[name]
+            stats.requests += 1
+            if request.transport is not None:
+                self.connections.add(request.transport.get_extra_info("peername"))
+            stats.in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                if self._limited(stats, profile):
+                    stats.limited += 1
+                    return web.json_response({"status": "error", "error": "TOO_MANY_REQUESTS"}, status=429)
+                if profile.latency or profile.jitter:
+                    await asyncio.sleep(profile.latency + self.random.uniform(0, profile.jitter))
+                if profile.error_rate and self.random.random() < profile.error_rate:
+                    stats.errors += 1
+                    return web.json_response({"status": "error", "error": "SIMULATED_FAILURE"}, status=500)
+                if auth and request.headers.get("Authorization") != f'Bearer {self.token}':
+                    return web.json_response({"status": "error", "error": "NOT_AUTHORIZED"}, status=403)
+
+                if raw:
+                    return await handler(request)
+                payload = {"status": "ok", "data": await handler(request)}
+                if profile.padding:
+                    # Real panels send many fields the integration never reads
+                    payload["padding"] = "x" * profile.padding
+                body = json.dumps(payload).encode()
+                stats.bytes += len(body)
+                return web.Response(body=body, content_type="application/json")
+            finally:
+                stats.in_flight -= 1
+                self.in_flight -= 1
+
+        return endpoint
+
+def load_profiles(path: str | None) -> dict[str, EndpointProfile]:
+    if path is None:
+        return {}
+    with open(path) as file:
+        data = json.load(file)
+    names = {item.name for item in fields(EndpointProfile)}
+    return {endpoint: EndpointProfile(**{key: value for key, value in profile.items() if key in names}) for endpoint, profile in data.items()}
+
+async def main(args: argparse.Namespace) -> None:
+    simulator = CraftySimulator(FakeCrafty(args.servers, args.roles, args.users, args.seed), load_profiles(args.profiles), args.action_delay, args.seed)
+    url = await simulator.async_start(args.host, args.port)
+    print(f'Serving {args.servers} servers on {url}, log in with any username and password')
+    try:
+        while True:
+            await asyncio.sleep(args.push_interval or 3600)
+            if args.push_interval:
+                await simulator.push_status()
+    finally:
+        await simulator.async_stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated Crafty Controller API")
+    parser.add_argument("--servers", type=int, default=100)
+    parser.add_argument("--roles", type=int)
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--profiles", help="JSON file of endpoint profiles")
+    parser.add_argument("--action-delay", type=float, default=0)
+    parser.add_argument("--push-interval", type=float, default=0, help="Seconds between update_server_status frames on the websocket, 0 to not push")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,29 @@
+"""Refresh cost of both coordinator tiers and the memory their snapshots hold."""
+from fleet import FakeCrafty, async_setup_fleet
+from measure import async_measure, async_retained, rounds_for
+
+async def test_data_update(hass, results, fleet_size):
+    client = FakeCrafty(fleet_size)
+    entry, data = await async_setup_fleet(hass, client)
+
+    calls = client.calls
+    wall, cpu = await async_measure(data.coordinator._async_update_data, rounds_for(fleet_size))
+    results.record(f'data_update[{fleet_size}].wall_s', wall)
+    results.record(f'data_update[{fleet_size}].cpu_s', cpu)
+    results.record(f'data_update[{fleet_size}].requests', (client.calls - calls) / rounds_for(fleet_size))
+    results.record(f'data_snapshot[{fleet_size}].bytes', await async_retained(data.coordinator._async_update_data))
+
+    await data.coordinator.async_shutdown()
+    await data.stats_coordinator.async_shutdown()
+
+async def test_stats_update(hass, results, fleet_size):
+    client = FakeCrafty(fleet_size)
+    entry, data = await async_setup_fleet(hass, client)
+
+    wall, cpu = await async_measure(data.stats_coordinator._async_update_data, rounds_for(fleet_size))
+    results.record(f'stats_update[{fleet_size}].wall_s', wall)
+    results.record(f'stats_update[{fleet_size}].cpu_s', cpu)
+    results.record(f'stats_snapshot[{fleet_size}].bytes', await async_retained(data.stats_coordinator._async_update_data))
+
+    await data.coordinator.async_shutdown()
+    await data.stats_coordinator.async_shutdown()
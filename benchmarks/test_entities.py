@@ -0,0 +1,60 @@
+"""Cost of building the entities of a fleet, and of evaluating all of them once per coordinator update."""
+from custom_components.crafty_controller import button, image, sensor
+
+from fleet import FakeCrafty, async_setup_fleet
+from measure import async_measure, measure, rounds_for
+
+async def test_platform_setup(hass, results, fleet_size):
+    client = FakeCrafty(fleet_size)
+    entry, data = await async_setup_fleet(hass, client)
+
+    # The listeners a platform registers to track items, removed after every round so none of them stack up
+    unsubscribers = []
+    entry.async_on_unload = unsubscribers.append
+
+    def teardown() -> None:
+        while unsubscribers:
+            unsubscribers.pop()()
+
+    for platform in (sensor, button, image):
+        entities = []
+
+        async def setup() -> None:
+            entities.clear()
+            await platform.async_setup_entry(hass, entry, entities.extend)
+
+        wall, cpu = await async_measure(setup, rounds_for(fleet_size), teardown)
+        name = platform.__name__.rsplit(".", 1)[1]
+        results.record(f'{name}_setup[{fleet_size}].wall_s', wall)
+        results.record(f'{name}_setup[{fleet_size}].per_entity_us', wall / max(len(entities), 1) * 1e6)
+
+    await data.coordinator.async_shutdown()
+    await data.stats_coordinator.async_shutdown()
+
+async def test_entity_update(hass, results, fleet_size):
+    client = FakeCrafty(fleet_size)
+    entry, data = await async_setup_fleet(hass, client)
+    entities = []
+    for platform in (sensor, button, image):
+        await platform.async_setup_entry(hass, entry, entities.extend)
+
+    # What every entity computes when its coordinator publishes a new snapshot, short of the state machine write
+    def update() -> None:
+        for entity in entities:
+            entity._update_values()
+            entity.available
+
+    snapshots = [await data.stats_coordinator._async_update_data() for _ in range(rounds_for(fleet_size))]
+    metadata = await data.coordinator._async_update_data()
+
+    def update_next() -> None:
+        data.stats_coordinator.data = snapshots.pop()
+        data.coordinator.data = metadata
+        update()
+
+    wall, cpu = measure(update_next, rounds_for(fleet_size))
+    results.record(f'entity_update[{fleet_size}].cpu_s', cpu)
+    results.record(f'entity_update[{fleet_size}].per_entity_us', cpu / len(entities) * 1e6)
+
+    await data.coordinator.async_shutdown()
+    await data.stats_coordinator.async_shutdown()
@@ -0,0 +1,150 @@
+"""Load scenarios running the real CraftyClient over HTTP against the simulator: request concurrency, connection reuse,
+faults, rate limits and server actions pressed on the buttons."""
+import asyncio
+import time
+
+import pytest
+
+from crafty_controller_api import ServerActions
+
+from custom_components.crafty_controller import button
+from custom_components.crafty_controller.actions import RESULT_DONE, async_server_action_waves
+from custom_components.crafty_controller.api import CraftyClient
+
+from fleet import FakeCrafty, async_setup_fleet
+from simulator import CraftySimulator, EndpointProfile
+
+# A panel on the local network, a few milliseconds per request
+LAN = EndpointProfile(latency=0.002, jitter=0.003, padding=512)
+
+@pytest.fixture
+async def simulator_factory(socket_enabled):
+    simulators = []
+
+    async def factory(size: int, profiles: dict[str, EndpointProfile] | None = None, action_delay: float = 0) -> CraftySimulator:
+        simulator = CraftySimulator(FakeCrafty(size), {"*": LAN, **(profiles or {})}, action_delay)
+        simulators.append(simulator)
+        await simulator.async_start()
+        return simulator
+
+    yield factory
+    for simulator in simulators:
+        await simulator.async_stop()
+
+async def async_client(hass, simulator: CraftySimulator) -> CraftyClient:
+    client = CraftyClient(hass, "127.0.0.1", int(simulator.url.rsplit(":", 1)[1]), False, True, "admin", "password")
+    await client.login()
+    return client
+
+async def async_shutdown(data) -> None:
+    await data.coordinator.async_shutdown()
+    await data.stats_coordinator.async_shutdown()
+
+@pytest.mark.parametrize("concurrency", [1, 8, 32])
+async def test_refresh_over_http(hass, results, simulator_factory, load_size, concurrency):
+    """Both tiers through the shared aiohttp session, the request slots must cap what reaches Crafty."""
+    simulator = await simulator_factory(load_size)
+    client = await async_client(hass, simulator)
+    entry, data = await async_setup_fleet(hass, client, concurrency)
+    simulator.reset_stats()
+
+    start = time.perf_counter()
+    await data.coordinator.async_refresh()
+    await data.stats_coordinator.async_refresh()
+    wall = time.perf_counter() - start
+
+    assert data.coordinator.last_update_success and data.stats_coordinator.last_update_success
+    assert simulator.peak_in_flight <= concurrency
+    name = f'load_refresh[{load_size},c{concurrency}]'
+    results.record(f'{name}.wall_s', wall)
+    results.record(f'{name}.requests', simulator.requests)
+    # Distinct client sockets, pooling keeps this at or below the concurrency
+    results.record(f'{name}.connections', len(simulator.connections))
+
+    await async_shutdown(data)
+
+async def test_refresh_with_faults(hass, results, simulator_factory, load_size):
+    """A fifth of the per item requests fail, the refresh still succeeds on cached data and schedules a retry."""
+    failing = EndpointProfile(latency=LAN.latency, jitter=LAN.jitter, padding=LAN.padding, error_rate=0.2)
+    simulator = await simulator_factory(load_size)
+    client = await async_client(hass, simulator)
+    entry, data = await async_setup_fleet(hass, client)
+    simulator.profiles.update({name: failing for name in ("server_stats", "server_accesses", "user")})
+    simulator.reset_stats()
+
+    start = time.perf_counter()
+    await data.coordinator.async_refresh()
+    await data.stats_coordinator.async_refresh()
+    wall = time.perf_counter() - start
+
+    assert data.coordinator.last_update_success and data.stats_coordinator.last_update_success
+    assert len(data.stats_coordinator.data.servers) == load_size
+    assert data.stats_coordinator._revalidate_unsub is not None
+    results.record(f'load_faults[{load_size}].wall_s', wall)
+    results.record(f'load_faults[{load_size}].failed_requests', sum(stats.errors for stats in simulator.stats.values()))
+
+    await async_shutdown(data)
+
+async def test_rate_limited_stats(hass, results, simulator_factory, load_size):
+    """Crafty behind a proxy allowing 100 stats requests per second, how much of a refresh gets turned away."""
+    limited = EndpointProfile(latency=LAN.latency, jitter=LAN.jitter, padding=LAN.padding, rate=100, burst=20)
+    simulator = await simulator_factory(load_size, {"server_stats": limited})
+    client = await async_client(hass, simulator)
+    entry, data = await async_setup_fleet(hass, client)
+    simulator.reset_stats()
+
+    start = time.perf_counter()
+    await data.stats_coordinator.async_refresh()
+    wall = time.perf_counter() - start
+
+    assert data.stats_coordinator.last_update_success
+    stats = simulator.stats["server_stats"]
+    results.record(f'load_rate_limited[{load_size}].wall_s', wall)
+    results.record(f'load_rate_limited[{load_size}].limited_share', stats.limited / max(stats.requests, 1))
+
+    await async_shutdown(data)
+
+async def test_restart_all_buttons(hass, results, simulator_factory, load_size):
+    """Press Restart on every server at once, the queues follow them until Crafty reports them running again."""
+    simulator = await simulator_factory(load_size, action_delay=0.5)
+    client = await async_client(hass, simulator)
+    entry, data = await async_setup_fleet(hass, client)
+    entities = []
+    await button.async_setup_entry(hass, entry, entities.extend)
+    restarts = [entity for entity in entities if entity.entity_description.key == "restart_server"]
+    for server_id in simulator.fleet.running:
+        simulator.fleet.running[server_id] = False
+    simulator.reset_stats()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(entity.async_press() for entity in restarts))
+    pressed = time.perf_counter() - start
+    while data.actions.busy:
+        await asyncio.sleep(0.05)
+    settled = time.perf_counter() - start
+
+    assert all(server.running for server in data.stats_coordinator.data.servers)
+    assert simulator.stats["server_action"].requests == len(restarts)
+    results.record(f'load_restart_all[{load_size}].press_s', pressed)
+    results.record(f'load_restart_all[{load_size}].settled_s', settled)
+    results.record(f'load_restart_all[{load_size}].follow_requests', simulator.stats["server_stats"].requests)
+
+    await async_shutdown(data)
+
+async def test_restart_all_waves(hass, results, simulator_factory, load_size):
+    """The same mass restart through the server_action service path, ten at a time in waves of fifty."""
+    simulator = await simulator_factory(load_size, action_delay=0.5)
+    client = await async_client(hass, simulator)
+    entry, data = await async_setup_fleet(hass, client)
+    simulator.reset_stats()
+
+    start = time.perf_counter()
+    actions = await async_server_action_waves(data, list(simulator.fleet.running), ServerActions.RESTART_SERVER, concurrency=10, wave_size=50)
+    settled = time.perf_counter() - start
+
+    assert all(result.result == RESULT_DONE for result in actions)
+    assert simulator.stats["server_action"].peak_in_flight <= 10
+    results.record(f'load_restart_waves[{load_size}].settled_s', settled)
+    results.record(f'load_restart_waves[{load_size}].follow_requests', simulator.stats["server_stats"].requests)
+
+    await async_shutdown(data)
@@ -0,0 +1,124 @@
+"""Push mode against the dashboard websocket of the simulator: pushed stats applied without polling, the fall back to
+polling when the socket drops, and the reconnect backoff while the panel refuses it."""
+import asyncio
+import time
+from unittest.mock import patch
+
+from custom_components.crafty_controller import api, websocket
+from custom_components.crafty_controller.websocket import CraftyWebsocket
+
+from fleet import async_setup_fleet
+from test_load import async_client, async_shutdown, simulator_factory  # noqa: F401
+
+async def wait_for(condition, timeout: float = 10) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+async def async_start_push(hass, entry, client, data) -> tuple[CraftyWebsocket, asyncio.Task]:
+    socket = CraftyWebsocket(hass, client, data.stats_coordinator)
+    task = entry.async_create_background_task(hass, socket.async_run(), "crafty websocket")
+    return socket, task
+
+async def async_stop_push(task: asyncio.Task) -> None:
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+async def test_push_updates(hass, results, simulator_factory, load_size):
+    """Status frames for the whole fleet and details frames for one server, applied without a single stats request."""
+    simulator = await simulator_factory(load_size)
+    client = await async_client(hass, simulator)
+    entry, data = await async_setup_fleet(hass, client)
+    coordinator = data.stats_coordinator
+    socket, task = await async_start_push(hass, entry, client, data)
+    await wait_for(lambda: coordinator.push)
+    assert coordinator.update_interval == coordinator._max_interval
+
+    ids = list(simulator.fleet.running)
+    woken = []
+    for id in ids:
+        entry.async_on_unload(coordinator.async_add_listener(lambda id=id: woken.append(id), ("server", id)))
+    for id in ids[:10]:
+        simulator.fleet.running[id] = not simulator.fleet.running[id]
+    simulator.reset_stats()
+
+    start = time.perf_counter()
+    await simulator.push_status()
+    await wait_for(lambda: all(coordinator.data.server(id).running == simulator.fleet.running[id] for id in ids[:10]))
+    applied = time.perf_counter() - start
+    assert simulator.stats["server_stats"].requests == 0
+    assert socket.messages == 1
+
+    # A details frame only wakes the entities of its own server
+    woken.clear()
+    simulator.fleet.running[ids[0]] = not simulator.fleet.running[ids[0]]
+    await simulator.push_details(ids[0])
+    await wait_for(lambda: socket.messages == 2)
+    assert coordinator.data.server(ids[0]).running == simulator.fleet.running[ids[0]]
+    assert set(woken) == {ids[0]}
+    assert simulator.stats["server_stats"].requests == 0
+
+    results.record(f'push_status[{load_size}].apply_s', applied)
+    results.record(f'push_status[{load_size}].frame_bytes', simulator.stats["websocket"].bytes)
+
+    await async_stop_push(task)
+    await async_shutdown(data)
+
+async def test_push_fallback(hass, results, simulator_factory, load_size):
+    """Dropping the socket brings polling back right away, the next connection switches to push again."""
+    simulator = await simulator_factory(load_size)
+    client = await async_client(hass, simulator)
+    entry, data = await async_setup_fleet(hass, client)
+    coordinator = data.stats_coordinator
+    with patch.object(websocket, "RECONNECT_INITIAL_DELAY", 0.2):
+        socket, task = await async_start_push(hass, entry, client, data)
+        await wait_for(lambda: coordinator.push)
+        simulator.reset_stats()
+
+        start = time.perf_counter()
+        await simulator.drop_websockets()
+        await wait_for(lambda: not coordinator.push)
+        assert coordinator.update_interval == coordinator._base_interval
+        # The missed pushes are caught up by an immediate poll of every server
+        await wait_for(lambda: simulator.stats["server_stats"].requests >= load_size)
+        caught_up = time.perf_counter() - start
+        await wait_for(lambda: coordinator.push)
+
+    assert simulator.stats["websocket"].requests == 1
+    results.record(f'push_fallback[{load_size}].poll_s', caught_up)
+
+    await async_stop_push(task)
+    await async_shutdown(data)
+
+async def test_push_reconnect_backoff(hass, simulator_factory):
+    """A panel refusing the socket is retried at doubling delays, and a rejected token is renewed at most once per cooldown."""
+    simulator = await simulator_factory(10)
+    client = await async_client(hass, simulator)
+    entry, data = await async_setup_fleet(hass, client)
+    simulator.websocket_status = 503
+    simulator.reset_stats()
+    with patch.object(websocket, "RECONNECT_INITIAL_DELAY", 0.02), patch.object(websocket, "RECONNECT_MAX_DELAY", 0.16):
+        socket, task = await async_start_push(hass, entry, client, data)
+        await wait_for(lambda: len(simulator.websocket_attempts) >= 7)
+
+        gaps = [later - earlier for earlier, later in zip(simulator.websocket_attempts, simulator.websocket_attempts[1:])]
+        assert all(0.015 <= gap for gap in gaps)
+        assert gaps[3] > gaps[0] * 4
+        assert max(gaps) < 0.16 * 2
+        assert not data.stats_coordinator.push
+
+        # Crafty restarted and no longer knows the token, the socket keeps being refused
+        simulator.expire_token()
+        simulator.websocket_status = None
+        attempts = len(simulator.websocket_attempts)
+        await wait_for(lambda: len(simulator.websocket_attempts) >= attempts + 4)
+        assert simulator.stats["login"].requests == 0
+        assert not data.stats_coordinator.push
+
+        # Past the cooldown a single login gets the socket connected again
+        with patch.object(api, "RELOGIN_COOLDOWN", 0):
+            await wait_for(lambda: data.stats_coordinator.push)
+    assert simulator.stats["login"].requests == 1
+
+    await async_stop_push(task)
+    await async_shutdown(data)
@@ -0,0 +1,80 @@
+"""Starting from the snapshot saved on disk while the simulated Crafty does not answer: the restored data has to stay
+flagged as restored, expire after the staleness limit and never be saved again as if it were live."""
+import asyncio
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.crafty_controller.const import CONF_MAX_STALENESS, DOMAIN
+
+from simulator import EndpointProfile
+from test_load import LAN, simulator_factory  # noqa: F401
+from test_push import wait_for
+
+async def async_save(hass) -> None:
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+
+# Seconds restored data is served before its entities become unavailable
+MAX_STALENESS = 2
+
+async def test_restore_while_unreachable(hass, hass_storage, simulator_factory):
+    simulator = await simulator_factory(10)
+    port = int(simulator.url.rsplit(":", 1)[1])
+    entry = MockConfigEntry(domain=DOMAIN, data={"name": "", "username": "admin", "password": "password", "host": "127.0.0.1", "port": port, "ssl": False, "verify_ssl": True}, options={CONF_MAX_STALENESS: MAX_STALENESS})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    await async_save(hass)
+    key = f'{DOMAIN}.{entry.entry_id}.snapshot'
+    assert key in hass_storage
+
+    registry = er.async_get(hass)
+    cpu = registry.async_get_entity_id("sensor", DOMAIN, f'127.0.0.1_{port}_Crafty_Controller_server_cpu_server-1')
+    roles = registry.async_get_entity_id("sensor", DOMAIN, f'127.0.0.1_{port}_Crafty_Controller_role_users_1')
+    assert hass.states.get(cpu).state != "unavailable"
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # Crafty is down when Home Assistant starts again
+    simulator.profiles["*"] = EndpointProfile(error_rate=1)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    data = hass.data[DOMAIN][entry.entry_id]
+    # The first refresh runs in the background once the restored entities are set up
+    await wait_for(lambda: data.coordinator.refreshes.last is not None and data.stats_coordinator.refreshes.last is not None)
+    await hass.async_block_till_done()
+    assert data.coordinator.data.restored and data.stats_coordinator.data.restored
+    for entity_id in (cpu, roles):
+        state = hass.states.get(entity_id)
+        assert state.state != "unavailable"
+        assert state.attributes.get("restored") is True
+
+    # The snapshot stored on disk must not be written back while it is all there is
+    del hass_storage[key]
+    await async_save(hass)
+    assert key not in hass_storage
+
+    await asyncio.sleep(MAX_STALENESS)
+    await data.coordinator.async_refresh()
+    await data.stats_coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get(cpu).state == "unavailable"
+    assert hass.states.get(roles).state == "unavailable"
+
+    # Crafty answers again
+    simulator.profiles["*"] = LAN
+    await data.coordinator.async_refresh()
+    await data.stats_coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert not data.coordinator.data.restored and not data.stats_coordinator.data.restored
+    for entity_id in (cpu, roles):
+        state = hass.states.get(entity_id)
+        assert state.state != "unavailable"
+        assert "restored" not in state.attributes
+    await async_save(hass)
+    assert key in hass_storage
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -1,7 +1,12 @@
+import asyncio
+from datetime import timedelta
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.const import (
     CONF_USERNAME,
     CONF_PASSWORD,
@@ -9,21 +14,57 @@ from homeassistant.const import (
     CONF_PORT,
     CONF_SSL
     )
-from crafty_controller_api import FailedToLogin
+from crafty_controller_api import FailedToLogin, RequestError
 
-from .const import DOMAIN, CONF_VERIFY_SSL
-from .coordinator import CraftyDataCoordinator
-from .helpers import setup_client
+from .const import (
+    DOMAIN,
+    CONF_VERIFY_SSL,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_STATS_INTERVAL,
+    CONF_METADATA_INTERVAL,
+    CONF_MIN_STATS_INTERVAL,
+    CONF_MAX_STATS_INTERVAL,
+    CONF_PUSH_STATS,
+    CONF_MAX_STALENESS,
+    CONF_EXCLUDED_SERVERS,
+    CONF_EXCLUDED_ROLES,
+    CONF_EXCLUDED_USERS,
+    CONF_FAMILIES,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_STATS_INTERVAL,
+    DEFAULT_METADATA_INTERVAL,
+    DEFAULT_MIN_STATS_INTERVAL,
+    DEFAULT_MAX_STATS_INTERVAL,
+    DEFAULT_PUSH_STATS,
+    DEFAULT_MAX_STALENESS,
+    FAMILIES,
+    )
+from .actions import CraftyActionQueue
+from .coordinator import CraftyDataCoordinator, CraftyStatsCoordinator, CraftyEntryData
+from .entity import CraftyEntryNames
+from .helpers import async_setup_client, async_remove_client, entry_option
+from .models import CraftySelection
+from .pictures import CraftyPictureCache, async_remove_pictures
+from .websocket import CraftyWebsocket
+from .snapshot import CraftySnapshotStore, async_remove_snapshot
+from .services import async_setup_services
 
 PLATFORMS = [
     Platform.SENSOR,
     Platform.BUTTON,
+    Platform.IMAGE,
 ]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    async_setup_services(hass)
+    return True
+
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     try:
-        clients = await hass.async_add_executor_job(
-            setup_client,
+        clients = await async_setup_client(
+            hass,
             config_entry.data[CONF_USERNAME],
             config_entry.data[CONF_PASSWORD],
             config_entry.data[CONF_HOST],
@@ -32,16 +73,75 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
             config_entry.data[CONF_VERIFY_SSL],
         )
     except FailedToLogin as err:
-        raise ConfigEntryNotReady("Failed to Log-in") from err
-    coordinator = CraftyDataCoordinator(hass, clients)
+        raise ConfigEntryAuthFailed("Crafty refused the username or password") from err
+    except RequestError as err:
+        raise ConfigEntryNotReady(f'Failed to log in to Crafty: {err}') from err
+    semaphore = asyncio.Semaphore(entry_option(config_entry, CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS))
+    max_staleness = timedelta(seconds=entry_option(config_entry, CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS))
+    selection = CraftySelection(
+        frozenset(entry_option(config_entry, CONF_EXCLUDED_SERVERS, [])),
+        frozenset(entry_option(config_entry, CONF_EXCLUDED_ROLES, [])),
+        frozenset(entry_option(config_entry, CONF_EXCLUDED_USERS, [])),
+        frozenset(entry_option(config_entry, CONF_FAMILIES, FAMILIES)),
+    )
+    pictures = CraftyPictureCache(hass, clients, config_entry.entry_id)
+    await pictures.async_load()
+    coordinator = CraftyDataCoordinator(
+        hass,
+        clients,
+        semaphore,
+        pictures,
+        timedelta(seconds=entry_option(config_entry, CONF_METADATA_INTERVAL, DEFAULT_METADATA_INTERVAL)),
+        max_staleness,
+        selection,
+    )
+    stats_coordinator = CraftyStatsCoordinator(
+        hass,
+        clients,
+        semaphore,
+        coordinator,
+        timedelta(seconds=entry_option(config_entry, CONF_STATS_INTERVAL, DEFAULT_STATS_INTERVAL)),
+        timedelta(seconds=entry_option(config_entry, CONF_MIN_STATS_INTERVAL, DEFAULT_MIN_STATS_INTERVAL)),
+        timedelta(seconds=entry_option(config_entry, CONF_MAX_STATS_INTERVAL, DEFAULT_MAX_STATS_INTERVAL)),
+        max_staleness,
+        selection,
+    )
+
+    snapshots = CraftySnapshotStore(hass, config_entry.entry_id)
+    metadata, stats = await snapshots.async_load()
+    if metadata is None:
+        await coordinator.async_config_entry_first_refresh()
+        await stats_coordinator.async_config_entry_first_refresh()
+    else:
+        # Build entities from the last saved state right away and catch up with Crafty in the background
+        coordinator.async_set_restored_data(metadata)
+        stats_coordinator.async_set_restored_data(stats)
+
+        async def async_first_refresh() -> None:
+            await coordinator.async_refresh()
+            await stats_coordinator.async_refresh()
+
+        config_entry.async_create_background_task(hass, async_first_refresh(), f'{DOMAIN} first refresh {config_entry.entry_id}')
+    config_entry.async_on_unload(coordinator.async_add_listener(lambda: snapshots.async_schedule_save(coordinator, stats_coordinator)))
+    snapshots.async_schedule_save(coordinator, stats_coordinator)
 
-    await coordinator.async_config_entry_first_refresh()
-    hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = coordinator
+    websocket = None
+    if entry_option(config_entry, CONF_PUSH_STATS, DEFAULT_PUSH_STATS):
+        websocket = CraftyWebsocket(hass, clients, stats_coordinator)
+        config_entry.async_create_background_task(hass, websocket.async_run(), f'{DOMAIN} websocket {config_entry.entry_id}')
+
+    actions = CraftyActionQueue(hass, config_entry, clients, stats_coordinator)
+    hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = CraftyEntryData(clients, coordinator, stats_coordinator, pictures, selection, websocket, CraftyEntryNames(config_entry), actions)
 
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
+    config_entry.async_on_unload(config_entry.add_update_listener(async_reload_entry))
 
     return True
 
+async def async_reload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Reload Crafty config entry after its options changed."""
+    await hass.config_entries.async_reload(config_entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Unload Crafty config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(
@@ -50,4 +150,10 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
         del hass.data[DOMAIN][config_entry.entry_id]
         if not hass.data[DOMAIN]:
             del hass.data[DOMAIN]
-    return unload_ok
\ No newline at end of file
+    return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Remove the cached user pictures, snapshot and stored token of a deleted Crafty config entry."""
+    await async_remove_pictures(hass, config_entry.entry_id)
+    await async_remove_snapshot(hass, config_entry.entry_id)
+    await async_remove_client(hass, config_entry.data[CONF_USERNAME], config_entry.data[CONF_HOST], config_entry.data[CONF_PORT])
@@ -0,0 +1,229 @@
+import asyncio
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+import time
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from crafty_controller_api import ServerActions
+
+from .api import CraftyClient
+from .const import DOMAIN
+from .coordinator import FOLLOW_TIMEOUT, CraftyEntryData, CraftyStatsCoordinator
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+# Running state a server settles in after each action, None when it keeps its state
+ACTION_TARGETS: dict[ServerActions, bool | None] = {
+    ServerActions.START_SERVER: True,
+    ServerActions.STOP_SERVER: False,
+    ServerActions.RESTART_SERVER: True,
+    ServerActions.KILL_SERVER: False,
+    ServerActions.BACKUP_SERVER: None,
+}
+
+RESULT_DONE = "done"
+RESULT_SENT = "sent"
+RESULT_FAILED = "failed"
+RESULT_TIMEOUT = "timeout"
+RESULT_SUPERSEDED = "superseded"
+
+def conflicting(action: ServerActions, other: ServerActions) -> bool:
+    """Whether both actions lead to opposite running states."""
+    target = ACTION_TARGETS.get(action)
+    return target is not None and ACTION_TARGETS.get(other) not in (None, target)
+
+@dataclass
+class ActionResult:
+    server_id: str
+    action: ServerActions
+    result: str
+    running: bool | None = None
+    duration: float = 0
+    error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "server_id": self.server_id,
+            "action": self.action.value,
+            "result": self.result,
+            "running": self.running,
+            "duration": round(self.duration, 2),
+            "error": self.error,
+        }
+
+@dataclass
+class QueuedAction:
+    """An action waiting for or running on a server, sent resolves once Crafty took it and done once the server settled."""
+    action: ServerActions
+    timeout: float
+    sent: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+    done: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+    def finish(self, result: ActionResult) -> None:
+        for future in (self.sent, self.done):
+            if not future.done():
+                future.set_result(result)
+
+@dataclass
+class ServerActionQueue:
+    pending: deque[QueuedAction] = field(default_factory=deque)
+    in_flight: QueuedAction | None = None
+    # Set when an action leading to the opposite state is queued, the in-flight one stops waiting for its state then
+    interrupt: asyncio.Event = field(default_factory=asyncio.Event)
+    worker: asyncio.Task | None = None
+    last_result: ActionResult | None = None
+
+class CraftyActionQueue():
+    """Runs the actions of every server one after another, each until the server settled.
+
+    Queueing an action already pending (or in flight with nothing behind it) returns the queued one instead,
+    and an action leading to the opposite running state drops the pending ones leading to the other.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry, client: CraftyClient, stats_coordinator: CraftyStatsCoordinator) -> None:
+        self._hass = hass
+        self._config_entry = config_entry
+        self._client = client
+        self._stats_coordinator = stats_coordinator
+        self._queues: dict[str, ServerActionQueue] = {}
+        self._listeners: dict[str, list[CALLBACK_TYPE]] = {}
+
+    @property
+    def busy(self) -> bool:
+        return any(queue.worker is not None for queue in self._queues.values())
+
+    def in_flight(self, server_id: str) -> ServerActions | None:
+        queue = self._queues.get(server_id)
+        return queue.in_flight.action if queue and queue.in_flight else None
+
+    def pending(self, server_id: str) -> list[ServerActions]:
+        queue = self._queues.get(server_id)
+        return [item.action for item in queue.pending] if queue else []
+
+    def last_result(self, server_id: str) -> ActionResult | None:
+        queue = self._queues.get(server_id)
+        return queue.last_result if queue else None
+
+    @callback
+    def async_add_listener(self, server_id: str, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        """Call update_callback whenever the queue of the server changes."""
+        listeners = self._listeners.setdefault(server_id, [])
+        listeners.append(update_callback)
+        return lambda: listeners.remove(update_callback)
+
+    @callback
+    def _notify(self, server_id: str) -> None:
+        for update_callback in list(self._listeners.get(server_id, [])):
+            update_callback()
+
+    @callback
+    def async_enqueue(self, server_id: str, action: ServerActions, timeout: float = FOLLOW_TIMEOUT) -> QueuedAction:
+        queue = self._queues.setdefault(server_id, ServerActionQueue())
+
+        for item in [item for item in queue.pending if conflicting(action, item.action)]:
+            queue.pending.remove(item)
+            item.finish(ActionResult(server_id, item.action, RESULT_SUPERSEDED))
+            _LOGGER.debug("Dropped pending %s of %s for %s", item.action.value, server_id, action.value)
+
+        item = next((item for item in queue.pending if item.action == action), None)
+        if item is None and queue.in_flight is not None and queue.in_flight.action == action and not queue.pending:
+            item = queue.in_flight
+        if item is None:
+            item = QueuedAction(action, timeout)
+            queue.pending.append(item)
+            if queue.worker is None:
+                queue.worker = self._config_entry.async_create_background_task(self._hass, self._run(server_id, queue), f'{DOMAIN} actions {server_id}')
+
+        # The in-flight action stops waiting for its state while one leading to the opposite state is queued behind it
+        if queue.in_flight is not None and any(conflicting(pending.action, queue.in_flight.action) for pending in queue.pending):
+            queue.interrupt.set()
+        else:
+            queue.interrupt.clear()
+        self._notify(server_id)
+        return item
+
+    async def _run(self, server_id: str, queue: ServerActionQueue) -> None:
+        try:
+            while queue.pending:
+                item = queue.in_flight = queue.pending.popleft()
+                queue.interrupt.clear()
+                self._notify(server_id)
+                result = await self._execute(server_id, item, queue.interrupt)
+                queue.in_flight = None
+                queue.last_result = result
+                item.finish(result)
+        finally:
+            # Unloading the entry cancels the worker, nobody may keep waiting for its actions
+            for item in ([queue.in_flight] if queue.in_flight else []) + list(queue.pending):
+                item.finish(ActionResult(server_id, item.action, RESULT_FAILED, error="cancelled"))
+            queue.in_flight = None
+            queue.pending.clear()
+            queue.worker = None
+            self._notify(server_id)
+
+    async def _execute(self, server_id: str, item: QueuedAction, interrupt: asyncio.Event) -> ActionResult:
+        start = time.perf_counter()
+        try:
+            await self._client.server_action(server_id, item.action)
+        except Exception as err:
+            _LOGGER.warning("Failed to %s %s: %s", item.action.value, server_id, err)
+            return ActionResult(server_id, item.action, RESULT_FAILED, duration=time.perf_counter() - start, error=str(err))
+        item.sent.set_result(ActionResult(server_id, item.action, RESULT_SENT, duration=time.perf_counter() - start))
+
+        running = ACTION_TARGETS.get(item.action)
+        # Follow only this server until it settles instead of waiting for the next poll
+        follow = self._stats_coordinator.async_follow_server(server_id, running, item.timeout)
+        interrupted = asyncio.ensure_future(interrupt.wait())
+        try:
+            await asyncio.wait([follow, interrupted], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            interrupted.cancel()
+
+        data = self._stats_coordinator.data
+        server = data.server(server_id) if data else None
+        state = server.running if server else None
+        if running is None or state == running:
+            result = RESULT_DONE
+        elif interrupt.is_set():
+            result = RESULT_SUPERSEDED
+        else:
+            result = RESULT_TIMEOUT
+        return ActionResult(server_id, item.action, result, state, time.perf_counter() - start)
+
+async def async_server_action_waves(
+    data: CraftyEntryData,
+    server_ids: list[str],
+    action: ServerActions,
+    concurrency: int = 1,
+    wave_size: int = 5,
+    wave_delay: float = 0,
+    wait: bool = True,
+    timeout: float = FOLLOW_TIMEOUT,
+) -> list[ActionResult]:
+    """Run an action on many servers in waves of wave_size, at most concurrency at a time within a wave.
+
+    A wave ends once all of its servers settled (or timed out) when waiting, the next one starts wave_delay
+    seconds later, so the load of a mass restart on the host is spread out. The actions are queued behind
+    whatever else the servers are doing.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def run(server_id: str) -> ActionResult:
+        async with semaphore:
+            item = data.actions.async_enqueue(server_id, action, timeout)
+            # The queue keeps running the action when the service call goes away
+            return await asyncio.shield(item.done if wait else item.sent)
+
+    waves = [server_ids[idx:idx + wave_size] for idx in range(0, len(server_ids), wave_size)]
+    for idx, wave in enumerate(waves):
+        if idx > 0 and wave_delay:
+            await asyncio.sleep(wave_delay)
+        _LOGGER.debug("Running %s on wave %s of %s: %s", action.value, idx + 1, len(waves), wave)
+        results.extend(await asyncio.gather(*(run(server_id) for server_id in wave)))
+    return results
@@ -0,0 +1,205 @@
+import asyncio
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
+import time
+from typing import Any
+
+from aiohttp import ClientError, ClientTimeout, ClientWebSocketResponse
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util.json import json_loads
+from homeassistant.util.ssl import get_default_context, get_default_no_verify_context
+
+from crafty_controller_api import ServerActions, FailedToLogin, RequestError
+
+from .metrics import CraftyMetrics, endpoint
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+JSON_EXECUTOR_THRESHOLD = 64 * 1024
+REQUEST_TIMEOUT = ClientTimeout(total=30)
+# A rejected token is renewed at most once per cooldown, so endpoints the user may not access don't cause login storms
+RELOGIN_COOLDOWN = 60
+
+class CraftyUnavailable(RequestError):
+    """Crafty did not answer, or answered with a server error, as opposed to refusing a request."""
+
+class CraftyClient():
+    """Async Crafty API client running on Home Assistant's shared aiohttp session."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        host: str,
+        port: int,
+        ssl: bool,
+        verify_ssl: bool,
+        username: str,
+        password: str,
+        token: str | None = None,
+        token_callback: Callable[[str], None] | None = None,
+    ) -> None:
+        self._hass = hass
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.verify_ssl = verify_ssl
+        self.username = username
+        self.password = password
+        self.token = token
+        self._token_callback = token_callback
+        self._login_lock = asyncio.Lock()
+        self._last_login: float | None = None
+        self.metrics = CraftyMetrics()
+
+        self.base_url = f'http{"s" if ssl else ""}://{host}:{port}'
+        self._session = async_get_clientsession(hass, verify_ssl)
+        # Both contexts are cached by Home Assistant, so every request reuses the same one
+        self._ssl_context = (get_default_context() if verify_ssl else get_default_no_verify_context()) if ssl else False
+
+    async def _decode(self, body: bytes) -> Any:
+        if len(body) > JSON_EXECUTOR_THRESHOLD:
+            return await self._hass.async_add_executor_job(json_loads, body)
+        return json_loads(body)
+
+    async def _make_request(self, path: str, method: str = "GET", data: dict[str, Any] | None = None, retry: bool = True) -> dict[str, Any] | list | None:
+        token = self.token
+        headers = {"Authorization": f'Bearer {token}'} if token else {}
+        path = path if path.startswith("/") else "/" + str(path)
+        url = f'{self.base_url}/api/v2{path}'
+        start = time.perf_counter()
+        try:
+            async with self._session.request(method, url, headers=headers, json=data, ssl=self._ssl_context, timeout=REQUEST_TIMEOUT) as response:
+                status = response.status
+                body = await response.read()
+        except (ClientError, TimeoutError) as err:
+            self.metrics.record(endpoint(method, path), time.perf_counter() - start, 0, False)
+            raise CraftyUnavailable(f'{method} {path} failed: {err}') from err
+        latency = time.perf_counter() - start
+        try:
+            payload = await self._decode(body)
+        except ValueError:
+            payload = None
+        self.metrics.record(endpoint(method, path), latency, len(body), isinstance(payload, dict) and payload.get("status") == "ok")
+
+        if retry and self._auth_failed(status, payload) and await self.renew_token(token):
+            return await self._make_request(path, method, data, False)
+        if isinstance(payload, dict) and payload.get("status") == "ok":
+            return payload.get("data")
+        # An error payload must not read as an empty result, callers fall back to their last good data
+        error = CraftyUnavailable if status >= 500 else RequestError
+        raise error(f'{method} {path} failed: {payload.get("error") if isinstance(payload, dict) else f"HTTP {status}"}')
+
+    @staticmethod
+    def _auth_failed(status: int, payload: Any) -> bool:
+        return status == 401 or (status == 403 and isinstance(payload, dict) and payload.get("error") == "NOT_AUTHORIZED")
+
+    async def renew_token(self, token: str | None) -> bool:
+        """Renew a rejected token, whether the next attempt has a new one to use.
+
+        Requests and the websocket that raced on the same token wait for a single login, and logins are at
+        least RELOGIN_COOLDOWN seconds apart. Raises FailedToLogin when Crafty refuses the credentials.
+        """
+        async with self._login_lock:
+            if self.token != token:
+                return True
+            if self._last_login is not None and time.monotonic() - self._last_login < RELOGIN_COOLDOWN:
+                return False
+            _LOGGER.debug("Token for %s was rejected, logging in again", self.base_url)
+            try:
+                await self.login()
+            except CraftyUnavailable as err:
+                _LOGGER.debug("Failed to log in to %s: %s", self.base_url, err)
+                return False
+            return True
+
+    async def login(self) -> None:
+        self._last_login = time.monotonic()
+        try:
+            data = await self._make_request("/auth/login", "POST", {"username": self.username, "password": self.password}, False)
+        except CraftyUnavailable:
+            raise
+        except RequestError as err:
+            # Crafty answered and refused the credentials
+            raise FailedToLogin from err
+        if not data or not data.get("token"):
+            raise FailedToLogin
+        self.token = data["token"]
+        if self._token_callback is not None:
+            self._token_callback(self.token)
+
+    async def roles(self) -> list:
+        data = await self._make_request("/roles")
+        return [] if data is None else data
+
+    async def role_servers(self, id: int) -> list:
+        data = await self._make_request(f'/roles/{id}/servers')
+        return [] if data is None else data
+
+    async def role_users(self, id: int) -> list:
+        data = await self._make_request(f'/roles/{id}/users')
+        return [] if data is None else data
+
+    async def servers(self) -> list:
+        data = await self._make_request("/servers")
+        return [] if data is None else data
+
+    async def server_stats(self, id: str) -> dict[str, Any]:
+        data = await self._make_request(f'/servers/{id}/stats')
+        return {} if data is None else data
+
+    async def server_accesses(self, id: str) -> list:
+        data = await self._make_request(f'/servers/{id}/users')
+        return [] if data is None else data
+
+    async def server_webhooks(self, id: str) -> list:
+        data = await self._make_request(f'/servers/{id}/webhook')
+        return [] if data is None else data
+
+    async def server_action(self, id: str, action: ServerActions) -> bool | dict[str, Any]:
+        data = await self._make_request(f'/servers/{id}/action/{action.value}', "POST")
+        return True if data is None else data
+
+    async def users(self) -> list:
+        data = await self._make_request("/users")
+        return [] if data is None else data
+
+    async def user(self, id: int) -> dict[str, Any]:
+        data = await self._make_request(f'/users/{id}')
+        return {} if data is None else data
+
+    async def user_picture(self, id: int) -> str | None:
+        data = await self._make_request(f'/users/{id}/pfp')
+        if not isinstance(data, str):
+            return None
+        return data if data.startswith("http") else self.base_url + data
+
+    def websocket(self, page: str = "/panel/dashboard", heartbeat: float = 30) -> AbstractAsyncContextManager[ClientWebSocketResponse]:
+        """Open the websocket the Crafty panel uses for live updates, authenticated by the token cookie."""
+        return self._session.ws_connect(
+            f'ws{"s" if self.ssl else ""}://{self.host}:{self.port}/ws',
+            params={"page": page, "page_query_params": ""},
+            headers={"Cookie": f'token={self.token}'},
+            ssl=self._ssl_context,
+            heartbeat=heartbeat,
+        )
+
+    async def download(self, url: str, etag: str | None = None) -> tuple[bytes | None, str | None, str | None]:
+        """Fetch a static file such as a picture, returning (body, content type, etag), body is None when not modified."""
+        headers = {"If-None-Match": etag} if etag else {}
+        ssl = self._ssl_context if url.startswith(self.base_url) else True
+        start = time.perf_counter()
+        try:
+            async with self._session.get(url, headers=headers, ssl=ssl, timeout=REQUEST_TIMEOUT) as response:
+                if response.status == 304:
+                    self.metrics.record("GET download", time.perf_counter() - start, 0, True)
+                    return (None, None, etag)
+                response.raise_for_status()
+                body = await response.read()
+                self.metrics.record("GET download", time.perf_counter() - start, len(body), True)
+                return (body, response.content_type, response.headers.get("ETag"))
+        except (ClientError, TimeoutError) as err:
+            self.metrics.record("GET download", time.perf_counter() - start, 0, False)
+            raise RequestError(f'GET {url} failed: {err}') from err
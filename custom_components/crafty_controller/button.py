@@ -1,45 +1,53 @@
-from typing import Any, Callable, Dict, Optional
+from typing import Callable
+from dataclasses import dataclass
 
-from homeassistant.const import CONF_NAME
+from homeassistant.components.button import ButtonEntityDescription
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 from crafty_controller_api import ServerActions
 
-from .const import DOMAIN
-from .coordinator import CraftyDataCoordinator
-from .entity import CraftyButtonEntity
-from .helpers import find_dict
-
-action_types = [
-        {
-            "action": ServerActions.START_SERVER,
-            "name": "Start server",
-            "icon": "mdi:play"
-        },
-        {
-            "action": ServerActions.STOP_SERVER,
-            "name": "Stop server",
-            "icon": "mdi:stop"
-        },
-        {
-            "action": ServerActions.RESTART_SERVER,
-            "name": "Restart server",
-            "icon": "mdi:restart"
-        },
-        {
-            "action": ServerActions.KILL_SERVER,
-            "name": "Kill server",
-            "icon": "mdi:power"
-        },
-        {
-            "action": ServerActions.BACKUP_SERVER,
-            "name": "Backup server",
-            "icon": "mdi:cloud-upload"            
-        }
-    ]
-
-
+from .const import DOMAIN, FAMILY_SERVER_BUTTONS
+from .actions import CraftyActionQueue
+from .coordinator import CraftyDataCoordinator, CraftyEntryData
+from .entity import CraftyButtonEntity, CraftyEntryNames, async_track_items
+
+@dataclass(frozen=True, kw_only=True)
+class CraftyServerButtonEntityDescription(ButtonEntityDescription):
+    action: ServerActions
+
+SERVER_BUTTONS = [
+    CraftyServerButtonEntityDescription(
+        key="start_server",
+        action=ServerActions.START_SERVER,
+        name="Start server",
+        icon="mdi:play",
+    ),
+    CraftyServerButtonEntityDescription(
+        key="stop_server",
+        action=ServerActions.STOP_SERVER,
+        name="Stop server",
+        icon="mdi:stop",
+    ),
+    CraftyServerButtonEntityDescription(
+        key="restart_server",
+        action=ServerActions.RESTART_SERVER,
+        name="Restart server",
+        icon="mdi:restart",
+    ),
+    CraftyServerButtonEntityDescription(
+        key="kill_server",
+        action=ServerActions.KILL_SERVER,
+        name="Kill server",
+        icon="mdi:power",
+    ),
+    CraftyServerButtonEntityDescription(
+        key="backup_server",
+        action=ServerActions.BACKUP_SERVER,
+        name="Backup server",
+        icon="mdi:cloud-upload",
+    ),
+]
 
 import logging
 _LOGGER = logging.getLogger(__name__)
@@ -50,35 +58,42 @@ async def async_setup_entry(
     async_add_entities: Callable,
 ) -> None:
     """Set up Crafty button from config entry."""
-    coordinator: CraftyDataCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    data: CraftyEntryData = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = data.coordinator
+
+    selection = data.selection
+    if not selection.has(FAMILY_SERVER_BUTTONS):
+        return
 
-    servers = [CraftyServerButton(coordinator, config_entry, hass, server["server_id"], type) for type in action_types for server in coordinator.data.get("servers") if server.get("server_id")]
+    def server_buttons(server_id: str) -> list[CraftyServerButton]:
+        if not selection.server(server_id):
+            return []
+        return [CraftyServerButton(coordinator, data.actions, config_entry, hass, data.names, description, server_id) for description in SERVER_BUTTONS]
 
-    async_add_entities(servers, update_before_add=True)
+    async_track_items(hass, config_entry, coordinator, async_add_entities, {"server": server_buttons})
 
-def action_decorator(hass, id, action):
+def action_decorator(actions, id, action):
     async def func(client):
-        await hass.async_add_executor_job(client.server_action, id, action)
+        # Queued behind the other actions of this server, the action sensor of the server shows how it went
+        actions.async_enqueue(id, action)
 
     return func
 
 
 class CraftyServerButton(CraftyButtonEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, hass: HomeAssistant, server_id: int, type: dict[str, Any]):
-        super().__init__(coordinator, config_entry, hass)
-
-        self._name = lambda x: f'{type.get("name")}'
-        self._device_name = find_dict(self._coordinator.data.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(self._coordinator.data.get("servers"), "server_id", server_id) else server_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Server'
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_server_{type.get("action")}_{server_id}'
-        self._icon = type.get("icon")
-        self._attr_entity_category = None
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Server {type.get("name")} {server_id}'
-        self.entity_id = f'button.{id}'.lower().replace(" ", "_")
-        self._action = action_decorator(self._hass, server_id, type.get("action"))
+    entity_description: CraftyServerButtonEntityDescription
 
-        via_device_name = "All Servers"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Servers'
+    def __init__(self, coordinator: CraftyDataCoordinator, actions: CraftyActionQueue, config_entry: ConfigEntry, hass: HomeAssistant, names: CraftyEntryNames, description: CraftyServerButtonEntityDescription, server_id: int):
+        super().__init__(coordinator, config_entry, hass, ("server", server_id))
+        self.entity_description = description
 
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}' #f'{self._host}_{self._port}_Crafty_Controller_server_{server_id}'
+        self._name = lambda x: description.name
+        self._device_name = self._coordinator.data.server_name(server_id)
+        self._model = names.model["server"]
+        self._unique_id = f'{names.unique_id}_server_{description.action}_{server_id}'
+        self._icon = description.icon
+        self._attr_entity_category = None
+        self.entity_id = names.object_id("button", f'Server {description.name} {server_id}')
+        self._action = action_decorator(actions, server_id, description.action)
 
+        self._via_device = names.via_device["server"]
@@ -0,0 +1,75 @@
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from crafty_controller_api import FailedToLogin
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+@dataclass(slots=True)
+class CacheEntry:
+    value: Any
+    updated: datetime
+    stale: bool = False
+
+class CraftyCache():
+    """Last good payload per endpoint and item, served stale while Crafty fails to answer.
+
+    Keys are (kind, id) contexts, an id of None stands for the list endpoint of that kind.
+    """
+
+    def __init__(self, max_age: timedelta) -> None:
+        self._max_age = max_age
+        self._entries: dict[tuple[str, Any], CacheEntry] = {}
+        self._seen: set[tuple[str, Any]] = set()
+        # Keys only known from a snapshot restored from disk, with the time of the restore
+        self._restored: dict[tuple[str, Any], datetime] = {}
+
+    @property
+    def stale(self) -> bool:
+        return bool(self._restored) or any(entry.stale for entry in self._entries.values())
+
+    @property
+    def restored(self) -> bool:
+        return bool(self._restored)
+
+    def restore(self, keys: set[tuple[str, Any]]) -> None:
+        """Track keys served from a restored snapshot, they age like stale entries until fetching them succeeds."""
+        now = dt_util.utcnow()
+        self._restored = dict.fromkeys(keys, now)
+
+    def store(self, key: tuple[str, Any], value: Any) -> None:
+        self._entries[key] = CacheEntry(value, dt_util.utcnow())
+        self._restored.pop(key, None)
+
+    async def async_fetch(self, key: tuple[str, Any], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a fresh value, or the last good one when fetching fails; raises only when nothing is cached."""
+        self._seen.add(key)
+        try:
+            value = await fetch()
+        except FailedToLogin:
+            raise
+        except Exception as err:
+            if (entry := self._entries.get(key)) is None:
+                raise
+            _LOGGER.debug("Serving %s cached at %s: %s", key, entry.updated, err)
+            entry.stale = True
+            return entry.value
+        self.store(key, value)
+        return value
+
+    def expired(self) -> set[tuple[str, Any]]:
+        """Keys that failed to revalidate for longer than the staleness limit."""
+        limit = dt_util.utcnow() - self._max_age
+        expired = {key for key, entry in self._entries.items() if entry.stale and entry.updated < limit}
+        return expired | {key for key, restored in self._restored.items() if restored < limit}
+
+    def prune(self) -> None:
+        """Forget items that were not requested since the last prune, e.g. deleted servers."""
+        self._entries = {key: entry for key, entry in self._entries.items() if key in self._seen}
+        self._restored = {key: restored for key, restored in self._restored.items() if key in self._seen}
+        self._seen = set()
@@ -1,8 +1,10 @@
+import asyncio
+from collections.abc import Mapping
 from typing import Any
 
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigEntry
+from homeassistant.config_entries import ConfigFlow, ConfigEntry, OptionsFlow, OptionsFlowWithConfigEntry
 from homeassistant.core import callback
 from homeassistant.const import (
     CONF_NAME,
@@ -13,18 +15,53 @@ from homeassistant.const import (
     CONF_SSL,
     )
 from homeassistant.helpers.selector import (
-    TextSelector,
-    TextSelectorConfig,
-    ConstantSelector,
-    ConstantSelectorConfig
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
 )
 from .const import (
     DOMAIN,
     DEFAULT_NAME,
     CONF_VERIFY_SSL,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_STATS_INTERVAL,
+    CONF_METADATA_INTERVAL,
+    CONF_MIN_STATS_INTERVAL,
+    CONF_MAX_STATS_INTERVAL,
+    CONF_PUSH_STATS,
+    CONF_MAX_STALENESS,
+    CONF_MAX_QUIET_TIME,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_EXCLUDED_SERVERS,
+    CONF_EXCLUDED_ROLES,
+    CONF_EXCLUDED_USERS,
+    CONF_FAMILIES,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_STATS_INTERVAL,
+    DEFAULT_METADATA_INTERVAL,
+    DEFAULT_MIN_STATS_INTERVAL,
+    DEFAULT_MAX_STATS_INTERVAL,
+    DEFAULT_PUSH_STATS,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_MAX_QUIET_TIME,
+    DEFAULT_COMPACT_ATTRIBUTES,
+    FAMILIES,
 )
-from .helpers import setup_client
-from crafty_controller_api import FailedToLogin
+from .helpers import async_setup_client, entry_option
+from crafty_controller_api import FailedToLogin, RequestError
+
+# Polling knobs, asked when the entry is created and editable in the options
+TUNING = {
+    CONF_MAX_CONCURRENT_REQUESTS: (DEFAULT_MAX_CONCURRENT_REQUESTS, vol.All(vol.Coerce(int), vol.Range(min=1))),
+    CONF_STATS_INTERVAL: (DEFAULT_STATS_INTERVAL, vol.All(vol.Coerce(int), vol.Range(min=1))),
+    CONF_METADATA_INTERVAL: (DEFAULT_METADATA_INTERVAL, vol.All(vol.Coerce(int), vol.Range(min=30))),
+    CONF_MIN_STATS_INTERVAL: (DEFAULT_MIN_STATS_INTERVAL, vol.All(vol.Coerce(int), vol.Range(min=1))),
+    CONF_MAX_STATS_INTERVAL: (DEFAULT_MAX_STATS_INTERVAL, vol.All(vol.Coerce(int), vol.Range(min=1))),
+    CONF_PUSH_STATS: (DEFAULT_PUSH_STATS, vol.All(bool)),
+    CONF_MAX_STALENESS: (DEFAULT_MAX_STALENESS, vol.All(vol.Coerce(int), vol.Range(min=0))),
+    CONF_MAX_QUIET_TIME: (DEFAULT_MAX_QUIET_TIME, vol.All(vol.Coerce(int), vol.Range(min=0))),
+    CONF_COMPACT_ATTRIBUTES: (DEFAULT_COMPACT_ATTRIBUTES, vol.All(bool)),
+}
 
 SCHEMA = vol.Schema({
     vol.Optional(CONF_NAME, default=""): vol.All(str),
@@ -34,6 +71,7 @@ SCHEMA = vol.Schema({
     vol.Required(CONF_PORT, default=8443): vol.All(vol.Coerce(int), vol.Range(min=0)),
     vol.Required(CONF_SSL, default=True): vol.All(bool),
     vol.Required(CONF_VERIFY_SSL, default=True): vol.All(bool),
+    **{vol.Optional(key, default=default): validator for key, (default, validator) in TUNING.items()},
 })
 
 import logging
@@ -42,6 +80,11 @@ _LOGGER = logging.getLogger(__name__)
 class CraftyConfigFlow(ConfigFlow, domain=DOMAIN):
     """Config flow for the Crafty integration."""
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        return CraftyOptionsFlow(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ):
@@ -50,19 +93,123 @@ class CraftyConfigFlow(ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             self._async_abort_entries_match({CONF_HOST: user_input[CONF_HOST], CONF_PORT: user_input[CONF_PORT]})
             try:
-                await self.hass.async_add_executor_job(
-                    setup_client,
+                await async_setup_client(
+                    self.hass,
                     user_input[CONF_USERNAME],
                     user_input[CONF_PASSWORD],
                     user_input[CONF_HOST],
                     user_input[CONF_PORT],
                     user_input[CONF_SSL],
                     user_input[CONF_VERIFY_SSL],
+                    validate=True,
                 )
-            except FailedToLogin as err:
+            except FailedToLogin:
                 errors = {'base': 'failed_to_login'}
+            except RequestError:
+                errors = {'base': 'cannot_connect'}
             else:
                 return self.async_create_entry(title=user_input[CONF_NAME] if len(user_input[CONF_NAME]) > 0 else DEFAULT_NAME, data=user_input)
 
         schema = self.add_suggested_values_to_schema(SCHEMA, user_input)
-        return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
\ No newline at end of file
+        return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
+
+    async def async_step_reauth(self, entry_data: Mapping[str, Any]):
+        self._reauth_entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ):
+        """Ask for new credentials after Crafty refused the stored ones."""
+        errors = {}
+        entry = self._reauth_entry
+
+        if user_input is not None:
+            data = {**entry.data, **user_input}
+            try:
+                await async_setup_client(
+                    self.hass,
+                    data[CONF_USERNAME],
+                    data[CONF_PASSWORD],
+                    data[CONF_HOST],
+                    data[CONF_PORT],
+                    data[CONF_SSL],
+                    data[CONF_VERIFY_SSL],
+                    validate=True,
+                )
+            except FailedToLogin:
+                errors = {'base': 'failed_to_login'}
+            except RequestError:
+                errors = {'base': 'cannot_connect'}
+            else:
+                self.hass.config_entries.async_update_entry(entry, data=data)
+                await self.hass.config_entries.async_reload(entry.entry_id)
+                return self.async_abort(reason="reauth_successful")
+
+        schema = vol.Schema({
+            vol.Required(CONF_USERNAME, default=entry.data[CONF_USERNAME]): vol.All(str),
+            vol.Required(CONF_PASSWORD): vol.All(str),
+        })
+        return self.async_show_form(step_id="reauth_confirm", data_schema=schema, errors=errors)
+
+def select(options: list[SelectOptionDict] | list[str], translation_key: str | None = None) -> SelectSelector:
+    if translation_key is None:
+        return SelectSelector(SelectSelectorConfig(options=options, multiple=True))
+    return SelectSelector(SelectSelectorConfig(options=options, multiple=True, translation_key=translation_key))
+
+def item_options(items: list[dict[str, Any]], key: str, label: str) -> list[SelectOptionDict]:
+    return [SelectOptionDict(value=str(item[key]), label=item.get(label, str(item[key]))) for item in items]
+
+class CraftyOptionsFlow(OptionsFlowWithConfigEntry):
+    """Pick the servers, roles, users and entity families that are set up and fetched, and tune polling."""
+
+    async def async_items(self) -> dict[str, list[SelectOptionDict]]:
+        """The servers, roles and users to pick from, as Crafty lists them or as last known when it can't be reached."""
+        data = self.config_entry.data
+        try:
+            client = await async_setup_client(
+                self.hass,
+                data[CONF_USERNAME],
+                data[CONF_PASSWORD],
+                data[CONF_HOST],
+                data[CONF_PORT],
+                data[CONF_SSL],
+                data[CONF_VERIFY_SSL],
+            )
+            servers, roles, users = await asyncio.gather(client.servers(), client.roles(), client.users())
+        except (FailedToLogin, RequestError) as err:
+            _LOGGER.debug("Crafty unreachable, offering the last known servers, roles and users: %s", err)
+        else:
+            # Crafty is asked directly, excluded items are missing from the coordinator data
+            return {
+                CONF_EXCLUDED_SERVERS: item_options(servers, "server_id", "server_name"),
+                CONF_EXCLUDED_ROLES: item_options(roles, "role_id", "role_name"),
+                CONF_EXCLUDED_USERS: item_options(users, "user_id", "username"),
+            }
+
+        # The loaded entry knows the included items, the excluded ones are kept by their ids
+        entry_data = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        snapshot = entry_data.coordinator.data if entry_data is not None else None
+        items = {}
+        for key, kind in ((CONF_EXCLUDED_SERVERS, "server"), (CONF_EXCLUDED_ROLES, "role"), (CONF_EXCLUDED_USERS, "user")):
+            names = {str(id): str(snapshot.name(kind, id)) for id in snapshot.ids(kind)} if snapshot is not None else {}
+            names.update({id: names.get(id, id) for id in entry_option(self.config_entry, key, [])})
+            items[key] = [SelectOptionDict(value=id, label=name) for id, name in names.items()]
+        return items
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ):
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        schema = {}
+        for key, options in (await self.async_items()).items():
+            known = {option["value"] for option in options}
+            default = [id for id in entry_option(self.config_entry, key, []) if id in known]
+            schema[vol.Optional(key, default=default)] = select(options)
+        schema[vol.Optional(CONF_FAMILIES, default=entry_option(self.config_entry, CONF_FAMILIES, FAMILIES))] = select(FAMILIES, CONF_FAMILIES)
+        for key, (default, validator) in TUNING.items():
+            schema[vol.Optional(key, default=entry_option(self.config_entry, key, default))] = validator
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema))
@@ -3,4 +3,53 @@ DOMAIN = "crafty_controller"
 DEFAULT_NAME = "Crafty Controller"
 
 
-CONF_VERIFY_SSL = "verify_ssl"
\ No newline at end of file
+CONF_VERIFY_SSL = "verify_ssl"
+CONF_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+CONF_STATS_INTERVAL = "stats_interval"
+CONF_METADATA_INTERVAL = "metadata_interval"
+CONF_MIN_STATS_INTERVAL = "min_stats_interval"
+CONF_MAX_STATS_INTERVAL = "max_stats_interval"
+CONF_PUSH_STATS = "push_stats"
+CONF_MAX_STALENESS = "max_staleness"
+CONF_EXCLUDED_SERVERS = "excluded_servers"
+CONF_EXCLUDED_ROLES = "excluded_roles"
+CONF_EXCLUDED_USERS = "excluded_users"
+CONF_FAMILIES = "families"
+CONF_MAX_QUIET_TIME = "max_quiet_time"
+CONF_COMPACT_ATTRIBUTES = "compact_attributes"
+
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+DEFAULT_STATS_INTERVAL = 15
+DEFAULT_METADATA_INTERVAL = 600
+DEFAULT_MIN_STATS_INTERVAL = 5
+DEFAULT_MAX_STATS_INTERVAL = 300
+DEFAULT_PUSH_STATS = False
+DEFAULT_MAX_STALENESS = 1800
+DEFAULT_MAX_QUIET_TIME = 300
+DEFAULT_COMPACT_ATTRIBUTES = False
+
+FAMILY_SERVER_STATS = "server_stats"
+FAMILY_SERVER_BUTTONS = "server_buttons"
+FAMILY_SERVER_DETAILS = "server_details"
+FAMILY_ROLE_USERS = "role_users"
+FAMILY_ROLE_MANAGER = "role_manager"
+FAMILY_ROLE_PERMISSIONS = "role_permissions"
+FAMILY_USER_ACTIVITY = "user_activity"
+FAMILY_USER_ACCOUNT = "user_account"
+FAMILY_USER_IP = "user_ip"
+FAMILY_USER_EMAIL = "user_email"
+FAMILY_USER_PICTURE = "user_picture"
+
+FAMILIES = [
+    FAMILY_SERVER_STATS,
+    FAMILY_SERVER_BUTTONS,
+    FAMILY_SERVER_DETAILS,
+    FAMILY_ROLE_USERS,
+    FAMILY_ROLE_MANAGER,
+    FAMILY_ROLE_PERMISSIONS,
+    FAMILY_USER_ACTIVITY,
+    FAMILY_USER_ACCOUNT,
+    FAMILY_USER_IP,
+    FAMILY_USER_EMAIL,
+    FAMILY_USER_PICTURE,
+]
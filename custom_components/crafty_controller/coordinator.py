@@ -1,109 +1,443 @@
+import asyncio
+from collections.abc import Awaitable, Callable
 from datetime import timedelta
 import logging
-from typing import Dict, Any
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryError
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
 
-from .const import DOMAIN
-from crafty_controller_api import Crafty, FailedToLogin
+from .api import CraftyClient
+from .cache import CraftyCache
+from .metrics import CURRENT_REFRESH, RefreshHistory, RefreshMetrics
+from .pictures import CraftyPictureCache
+from .models import CraftySelection, CraftySnapshot, ServerRecord, RoleRecord, UserRecord
+from .const import (
+    DOMAIN,
+    DEFAULT_METADATA_INTERVAL,
+    DEFAULT_STATS_INTERVAL,
+    DEFAULT_MIN_STATS_INTERVAL,
+    DEFAULT_MAX_STATS_INTERVAL,
+    DEFAULT_MAX_STALENESS,
+    FAMILY_SERVER_STATS,
+    FAMILY_SERVER_DETAILS,
+    FAMILY_ROLE_USERS,
+    FAMILY_ROLE_PERMISSIONS,
+    FAMILY_USER_ACTIVITY,
+    FAMILY_USER_ACCOUNT,
+    FAMILY_USER_IP,
+    FAMILY_USER_EMAIL,
+    FAMILY_USER_PICTURE,
+)
+from crafty_controller_api import FailedToLogin, RequestError
+
+if TYPE_CHECKING:
+    from .actions import CraftyActionQueue
+    from .entity import CraftyEntryNames
+    from .websocket import CraftyWebsocket
 
 _LOGGER = logging.getLogger(__name__)
 
-def filter_dict(d: dict, items: list):
-    output = {}
-    for key, value in d.items():
-        if key in items:
-            continue
-        output[key] = value
-    return output
+ITEM_TIMEOUT = 30
+KINDS = ("server", "role", "user")
+# Polls without any change in running servers or online players before the stats interval starts to grow
+IDLE_POLLS = 3
+# Follow-up polling of a single server after an action, in seconds
+FOLLOW_INITIAL_DELAY = 1
+FOLLOW_MAX_DELAY = 10
+FOLLOW_TIMEOUT = 120
+# First retry after a refresh served stale data, doubling up to the update interval
+REVALIDATE_INITIAL_DELAY = 5
+
+@dataclass
+class CraftyEntryData:
+    client: CraftyClient
+    coordinator: "CraftyDataCoordinator"
+    stats_coordinator: "CraftyStatsCoordinator"
+    pictures: CraftyPictureCache
+    selection: CraftySelection
+    websocket: "CraftyWebsocket | None" = None
+    names: "CraftyEntryNames | None" = None
+    actions: "CraftyActionQueue | None" = None
 
-class CraftyDataCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
-    def __init__(self, hass: HomeAssistant, client: Crafty):
+class CraftyCoordinator(DataUpdateCoordinator[CraftySnapshot]):
+    """Shared base of both tiers, each passes the method fetching its snapshot as update_method."""
+
+    def __init__(self, hass: HomeAssistant, client: CraftyClient, semaphore: asyncio.Semaphore, name: str, update_method: Callable[[], Awaitable[CraftySnapshot]], update_interval: timedelta, max_staleness: timedelta, selection: CraftySelection):
         self._client = client
+        self._selection = selection
+        self._semaphore = semaphore
+        self._cache = CraftyCache(max_staleness)
+        self._notified_data: CraftySnapshot | None = None
+        self._notified_success = True
+        self._revalidate_attempts = 0
+        self._revalidate_unsub: CALLBACK_TYPE | None = None
+        self.refreshes = RefreshHistory()
 
         super().__init__(
             hass,
             _LOGGER,
-            name=DOMAIN,
-            update_method=self._async_update_data,
-            update_interval=timedelta(minutes=10),
+            name=name,
+            update_method=update_method,
+            update_interval=update_interval,
         )
-    
-    async def _async_update_data(self) -> Dict[str, Any]:
+
+    @property
+    def client(self) -> CraftyClient:
+        return self._client
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Only wake the listeners whose server, role or user record changed since the last notification.
+
+        Listeners registered without a context (aggregates) are always called, and
+        everyone is called when availability flips.
+        """
+        changed = None
+        if self.data is not None and self.last_update_success == self._notified_success:
+            changed = self.data.changed_contexts(self._notified_data)
+        self._notified_data = self.data
+        self._notified_success = self.last_update_success
+
+        for update_callback, context in list(self._listeners.values()):
+            if changed is None or context is None or context in changed:
+                update_callback()
+
+    async def _async_update_data(self) -> CraftySnapshot:
+        """Run update_method while counting the time, requests and bytes of this refresh."""
+        refresh = RefreshMetrics()
+        token = CURRENT_REFRESH.set(refresh)
+        success = False
         try:
-            data = {
-                "client": self._client
-            }
-            items = {
-                "roles": self.get_roles,
-                "servers": self.get_servers,
-                "users": self.get_users,
-            }
-            
-            for key, value in items.items():
-                try:
-                    data[key] = await value()
-                except Exception as e:
-                    _LOGGER.warn(e)
-                    pass
+            data = await self.update_method()
+            success = True
             return data
         except FailedToLogin as err:
-            raise ConfigEntryError("Failed to Log-in") from err
-        except Exception as err:
-            raise ConfigEntryError("Crafty encoutered unknown") from err
+            raise ConfigEntryAuthFailed("Crafty refused the username or password") from err
+        except RequestError as err:
+            raise UpdateFailed(f'Failed to fetch data from Crafty: {err}') from err
+        finally:
+            CURRENT_REFRESH.reset(token)
+            self.refreshes.finish(refresh, success)
+
+    async def _call(self, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """Run a client call while holding one of the request slots shared by both tiers."""
+        async with self._semaphore:
+            return await func(*args)
+
+    async def _fetch(self, key: tuple[str, Any], *requests: tuple | None) -> Any:
+        """Run (func, *args) client calls under the item timeout, serving their last good results while they fail.
+
+        A request of None is skipped and yields None, so callers can leave out data nobody uses.
+        """
+        async def skip():
+            return None
+
+        async def fetch():
+            async with asyncio.timeout(ITEM_TIMEOUT):
+                results = await asyncio.gather(*(self._call(*request) if request else skip() for request in requests))
+            return results if len(results) > 1 else results[0]
+
+        return await self._cache.async_fetch(key, fetch)
+
+    @callback
+    def async_set_restored_data(self, data: CraftySnapshot) -> None:
+        """Serve a snapshot restored from disk until Crafty answers.
+
+        Whatever the refreshes can't fetch is still served from it, flagged as restored and expiring after the
+        staleness limit, as stale cache entries do.
+        """
+        self._cache.restore({(kind, None) for kind in KINDS} | {(kind, id) for kind in KINDS for id in data.ids(kind)})
+        self.async_set_updated_data(data)
+
+    def _snapshot(self, **items: Any) -> CraftySnapshot:
+        """Build the snapshot of a finished refresh and retry soon if any of it was served stale."""
+        self._cache.prune()
+        self._schedule_revalidation()
+        return CraftySnapshot(**items, expired=self._cache.expired(), restored=self._cache.restored)
+
+    def _schedule_revalidation(self) -> None:
+        if self._revalidate_unsub is not None:
+            self._revalidate_unsub()
+            self._revalidate_unsub = None
+        if not self._cache.stale:
+            self._revalidate_attempts = 0
+            return
+        delay = REVALIDATE_INITIAL_DELAY * 2 ** self._revalidate_attempts
+        if self.update_interval is not None:
+            delay = min(delay, self.update_interval.total_seconds())
+        self._revalidate_attempts += 1
+        self._revalidate_unsub = async_call_later(self.hass, delay, self._async_revalidate)
+
+    async def _async_revalidate(self, _now: Any) -> None:
+        self._revalidate_unsub = None
+        await self.async_refresh()
+
+    async def async_shutdown(self) -> None:
+        await super().async_shutdown()
+        if self._revalidate_unsub is not None:
+            self._revalidate_unsub()
+            self._revalidate_unsub = None
+
+class CraftyDataCoordinator(CraftyCoordinator):
+    """Slow tier: servers with their accesses and webhooks, roles and users."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: CraftyClient,
+        semaphore: asyncio.Semaphore,
+        pictures: CraftyPictureCache,
+        update_interval: timedelta = timedelta(seconds=DEFAULT_METADATA_INTERVAL),
+        max_staleness: timedelta = timedelta(seconds=DEFAULT_MAX_STALENESS),
+        selection: CraftySelection = CraftySelection(),
+    ):
+        self._pictures = pictures
+        super().__init__(hass, client, semaphore, DOMAIN, self._async_fetch_data, update_interval, max_staleness, selection)
+    
+    async def _async_fetch_data(self) -> CraftySnapshot:
+        data = {}
+        items = {
+            "roles": self.get_roles,
+            "servers": self.get_servers,
+            "users": self.get_users,
+        }
+
+        results = await asyncio.gather(*(value() for value in items.values()), return_exceptions=True)
+        for key, result in zip(items.keys(), results):
+            if isinstance(result, FailedToLogin):
+                raise result
+            if isinstance(result, Exception):
+                _LOGGER.warning("Failed to fetch %s: %s", key, result)
+                continue
+            data[key] = result
+        return self._snapshot(**data)
 
     async def get_roles(self):
-        roles = []
         try:
-            for role in await self.hass.async_add_executor_job(self._client.roles):
-                id = role.get("role_id")
-                if id is None:
-                    continue
-                data = {
-                    **role,
-                    "servers": await self.hass.async_add_executor_job(self._client.role_servers, id),
-                    "users": await self.hass.async_add_executor_job(self._client.role_users, id),
-                    }
-                roles.append(data)
-        except:
-            pass
-        return roles
+            roles = await self._fetch(("role", None), (self._client.roles,))
+        except FailedToLogin:
+            raise
+        except Exception as err:
+            _LOGGER.warning("Failed to fetch roles: %s", err)
+            return list(self.data.roles) if self.data else []
+        return await asyncio.gather(*(self.get_role(role) for role in roles or [] if role.get("role_id") is not None and self._selection.role(role["role_id"])))
+
+    async def get_role(self, role: dict[str, Any]) -> RoleRecord:
+        id = role["role_id"]
+        if not self._selection.has(FAMILY_ROLE_PERMISSIONS, FAMILY_ROLE_USERS):
+            return RoleRecord.from_api(role)
+        try:
+            servers, users = await self._fetch(
+                ("role", id),
+                (self._client.role_servers, id) if self._selection.has(FAMILY_ROLE_PERMISSIONS) else None,
+                (self._client.role_users, id) if self._selection.has(FAMILY_ROLE_USERS) else None,
+            )
+        except FailedToLogin:
+            raise
+        except Exception as err:
+            _LOGGER.warning("Failed to fetch details of role %s: %s", id, err)
+            return RoleRecord.from_api(role)
+        return RoleRecord.from_api(role, servers, users)
 
     async def get_servers(self):
-        servers = []
         try:
-            for server in await self.hass.async_add_executor_job(self._client.servers):
-                id = server.get("server_id")
-                if id is None:
-                    continue
-                stats = await self.hass.async_add_executor_job(self._client.server_stats, id)
-                data = {
-                    **server,
-                    **(filter_dict(stats, ["server_id"])),
-                    **(stats.get("server_id", {})),
-                    "accesses": await self.hass.async_add_executor_job(self._client.server_accesses, id),
-                    "webhooks": await self.hass.async_add_executor_job(self._client.server_webhooks, id),
-                    }
-                servers.append(data)
-        except:
-            pass
-        return servers
+            servers = await self._fetch(("server", None), (self._client.servers,))
+        except FailedToLogin:
+            raise
+        except Exception as err:
+            _LOGGER.warning("Failed to fetch servers: %s", err)
+            return list(self.data.servers) if self.data else []
+        return await asyncio.gather(*(self.get_server(server) for server in servers or [] if server.get("server_id") is not None and self._selection.server(server["server_id"])))
+
+    async def get_server(self, server: dict[str, Any]) -> ServerRecord:
+        id = server["server_id"]
+        if not self._selection.has(FAMILY_SERVER_DETAILS):
+            return ServerRecord.from_api(server)
+        try:
+            accesses, webhooks = await self._fetch(("server", id), (self._client.server_accesses, id), (self._client.server_webhooks, id))
+        except FailedToLogin:
+            raise
+        except Exception as err:
+            _LOGGER.warning("Failed to fetch details of server %s: %s", id, err)
+            return ServerRecord.from_api(server)
+        return ServerRecord.from_api(server, accesses, webhooks)
 
     async def get_users(self):
-        users = []
         try:
-            for user in await self.hass.async_add_executor_job(self._client.users):
-                id = user.get("user_id")
-                if id is None:
-                    continue
-                data = {
-                    **user,
-                    **(await self.hass.async_add_executor_job(self._client.user, id)),
-                    "picture": await self.hass.async_add_executor_job(self._client.user_picture, id),
-                    }
-                users.append(data)
-        except:
-            pass
-        return users
\ No newline at end of file
+            users = await self._fetch(("user", None), (self._client.users,))
+        except FailedToLogin:
+            raise
+        except Exception as err:
+            _LOGGER.warning("Failed to fetch users: %s", err)
+            return list(self.data.users) if self.data else []
+        details = await asyncio.gather(*(self.get_user(user) for user in users or [] if user.get("user_id") is not None and self._selection.user(user["user_id"])))
+
+        # Users often share a picture, download every url only once
+        urls = {url for _, url in details if url}
+        hashes = dict(zip(urls, await asyncio.gather(*(self._call(self._pictures.async_fetch, url) for url in urls))))
+
+        records = []
+        for user, url in details:
+            previous = self.data.user(user["user_id"]) if self.data else None
+            picture = hashes.get(url) if url or previous is None else previous.picture
+            records.append(UserRecord.from_api(user, picture))
+        await self._pictures.async_save({record.picture for record in records if record.picture})
+        return records
+
+    async def get_user(self, user: dict[str, Any]) -> tuple[dict[str, Any], str | None]:
+        id = user["user_id"]
+        wants_details = self._selection.has(FAMILY_USER_ACTIVITY, FAMILY_USER_ACCOUNT, FAMILY_USER_IP, FAMILY_USER_EMAIL)
+        if not wants_details and not self._selection.has(FAMILY_USER_PICTURE):
+            return (user, None)
+        try:
+            details, picture = await self._fetch(
+                ("user", id),
+                (self._client.user, id) if wants_details else None,
+                (self._client.user_picture, id) if self._selection.has(FAMILY_USER_PICTURE) else None,
+            )
+        except FailedToLogin:
+            raise
+        except Exception as err:
+            _LOGGER.warning("Failed to fetch details of user %s: %s", id, err)
+            return (user, None)
+        return ({**user, **(details or {})}, picture)
+
+class CraftyStatsCoordinator(CraftyCoordinator):
+    """Fast tier: live stats of the servers known to the slow tier, polled at an interval that follows fleet activity."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: CraftyClient,
+        semaphore: asyncio.Semaphore,
+        metadata: CraftyDataCoordinator,
+        update_interval: timedelta = timedelta(seconds=DEFAULT_STATS_INTERVAL),
+        min_interval: timedelta = timedelta(seconds=DEFAULT_MIN_STATS_INTERVAL),
+        max_interval: timedelta = timedelta(seconds=DEFAULT_MAX_STATS_INTERVAL),
+        max_staleness: timedelta = timedelta(seconds=DEFAULT_MAX_STALENESS),
+        selection: CraftySelection = CraftySelection(),
+    ):
+        self._metadata = metadata
+        self._base_interval = update_interval
+        self._min_interval = min(min_interval, update_interval)
+        self._max_interval = max(max_interval, update_interval)
+        self._activity: tuple | None = None
+        self._idle_polls = 0
+        self._follows: dict[str, asyncio.Task] = {}
+        self._push = False
+        super().__init__(hass, client, semaphore, f'{DOMAIN}_stats', self._async_fetch_data, update_interval, max_staleness, selection)
+
+    @property
+    def push(self) -> bool:
+        return self._push
+
+    @callback
+    def async_set_push(self, push: bool) -> None:
+        """Switch between websocket updates, with polling only as a slow consistency check, and regular polling."""
+        if push == self._push:
+            return
+        self._push = push
+        self._idle_polls = 0
+        self.update_interval = self._max_interval if push else self._base_interval
+        _LOGGER.debug("%s now %s", self.name, "receives pushed stats" if push else "polls stats")
+
+    async def _async_fetch_data(self) -> CraftySnapshot:
+        servers = self._metadata.data.servers if self._metadata.data else []
+        data = self._snapshot(servers=await asyncio.gather(*(self.get_server(server) for server in servers)))
+        self._adapt_interval(data)
+        return data
+
+    def _adapt_interval(self, data: CraftySnapshot) -> None:
+        """Poll at the floor while players are online or servers change state, back off towards the ceiling once the fleet stays flat.
+
+        Running servers without players never back off past the configured stats interval,
+        only a fully stopped fleet is allowed to reach the ceiling.
+        """
+        activity = tuple((server.server_id, server.running, server.online) for server in data.servers)
+        changed = self._activity is not None and activity != self._activity
+        self._activity = activity
+        if self._push:
+            return
+
+        if changed or any(server.running and server.online > 0 for server in data.servers):
+            self._idle_polls = 0
+            interval = self._min_interval
+        else:
+            self._idle_polls += 1
+            interval = self.update_interval
+            if self._idle_polls >= IDLE_POLLS:
+                ceiling = self._base_interval if any(server.running for server in data.servers) else self._max_interval
+                interval = min(interval * 2, ceiling)
+
+        if interval != self.update_interval:
+            _LOGGER.debug("Adjusting %s interval from %s to %s", self.name, self.update_interval, interval)
+            self.update_interval = interval
+
+    @callback
+    def async_follow_server(self, server_id: str, running: bool | None, timeout: float = FOLLOW_TIMEOUT) -> asyncio.Task:
+        """Poll a single server until it reaches the expected running state, replacing any follow-up already in progress."""
+        if (task := self._follows.pop(server_id, None)) is not None:
+            task.cancel()
+        task = self._follows[server_id] = self.config_entry.async_create_background_task(
+            self.hass, self._follow_server(server_id, running, timeout), f'{self.name} follow {server_id}'
+        )
+        return task
+
+    async def _follow_server(self, server_id: str, running: bool | None, timeout: float = FOLLOW_TIMEOUT) -> None:
+        delay = FOLLOW_INITIAL_DELAY
+        try:
+            async with asyncio.timeout(timeout):
+                while True:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, FOLLOW_MAX_DELAY)
+                    if not self.data or self.data.server(server_id) is None:
+                        return
+                    try:
+                        stats = await self._call(self._client.server_stats, server_id)
+                    except Exception as err:
+                        _LOGGER.debug("Failed to follow server %s: %s", server_id, err)
+                        continue
+                    self.async_set_servers({server_id: stats})
+                    if running is None or stats.get("running") == running:
+                        return
+        except TimeoutError:
+            _LOGGER.debug("Server %s did not reach running=%s in %s seconds", server_id, running, timeout)
+        finally:
+            if self._follows.get(server_id) is asyncio.current_task():
+                del self._follows[server_id]
+
+    @callback
+    def async_set_servers(self, stats: dict[str, dict[str, Any]]) -> None:
+        """Apply server_stats shaped payloads by server id, only the listeners of the changed servers get called."""
+        if not self.data:
+            return
+        for id, item in stats.items():
+            self._cache.store(("server", id), item)
+        data = CraftySnapshot(
+            servers=[server.with_stats(stats[server.server_id]) if server.server_id in stats else server for server in self.data.servers],
+            expired=self._cache.expired(),
+            restored=self._cache.restored,
+        )
+        if data.servers == self.data.servers and data.expired == self.data.expired and data.restored == self.data.restored:
+            return
+        self.data = data
+        self.async_update_listeners()
+
+    async def get_server(self, server: ServerRecord) -> ServerRecord:
+        id = server.server_id
+        if not self._selection.has(FAMILY_SERVER_STATS):
+            return server
+        try:
+            stats = await self._fetch(("server", id), (self._client.server_stats, id))
+        except FailedToLogin:
+            raise
+        except Exception as err:
+            _LOGGER.warning("Failed to fetch stats of server %s: %s", id, err)
+            # Keep the stats restored from disk rather than the bare metadata record
+            previous = self.data.server(id) if self.data else None
+            return previous or server
+        return server.with_stats(stats)
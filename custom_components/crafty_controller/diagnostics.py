@@ -0,0 +1,38 @@
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import CraftyCoordinator, CraftyEntryData
+
+TO_REDACT = {CONF_HOST, CONF_PASSWORD, CONF_USERNAME}
+
+def coordinator_diagnostics(coordinator: CraftyCoordinator) -> dict[str, Any]:
+    data = coordinator.data
+    return {
+        "update_interval": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+        "last_update_success": coordinator.last_update_success,
+        "servers": len(data.servers) if data else 0,
+        "roles": len(data.roles) if data else 0,
+        "users": len(data.users) if data else 0,
+        "expired": len(data.expired) if data else 0,
+        "restored": data.restored if data else False,
+        "refreshes": coordinator.refreshes.as_dict(),
+    }
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, config_entry: ConfigEntry) -> dict[str, Any]:
+    """Where the time of the refreshes goes: every refresh of both tiers and the latency of every Crafty endpoint."""
+    data: CraftyEntryData = hass.data[DOMAIN][config_entry.entry_id]
+    return {
+        "entry": {
+            "data": async_redact_data(config_entry.data, TO_REDACT),
+            "options": dict(config_entry.options),
+        },
+        "metadata": coordinator_diagnostics(data.coordinator),
+        "stats": {**coordinator_diagnostics(data.stats_coordinator), "push": data.stats_coordinator.push},
+        "websocket": {"connected": data.websocket.connected, "messages": data.websocket.messages} if data.websocket else None,
+        "endpoints": data.client.metrics.as_dict(),
+    }
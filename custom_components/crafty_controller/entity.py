@@ -1,12 +1,15 @@
+from collections.abc import Callable
 from typing import Any, Dict, Optional
 
 
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers import device_registry as dr, entity_registry as er
 from homeassistant.helpers.entity import Entity
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.button import ButtonEntity
-from homeassistant.core import HomeAssistant
+from homeassistant.components.image import ImageEntity
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.const import (
     CONF_NAME, 
     CONF_HOST,
@@ -14,67 +17,118 @@ from homeassistant.const import (
     )
 
 from .const import DOMAIN
-from .coordinator import CraftyDataCoordinator
+from .coordinator import CraftyCoordinator
 
-class CraftyServiceEntity(CoordinatorEntity[CraftyDataCoordinator], Entity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry):
-        super().__init__(coordinator)
-        self._coordinator = coordinator
-        self._host = config_entry.data[CONF_HOST]
-        self._port = config_entry.data[CONF_PORT]
+# Item kind: (model of an item, device grouping all items, model of that device)
+GROUPS = {
+    "server": ("Server", "All Servers", "Servers"),
+    "role": ("Role", "All Roles", "Roles"),
+    "user": ("User", "All Users", "Users"),
+}
 
-        self._name = f'{config_entry.data[CONF_NAME].capitalize()} Service' if config_entry.data[CONF_NAME] else "Service"
-        self._unique_id = f'{self._host}_{self._port}_crafty_service'
-        self._model = "Crafty Service"
-        self._manufacturer = "Crafty Controller"
+class CraftyEntryNames():
+    """Id, model and device strings shared by every entity of a config entry, built once per entry."""
 
-    @property
-    def name(self) -> str:
-        return self._name
+    def __init__(self, config_entry: ConfigEntry) -> None:
+        name = config_entry.data[CONF_NAME]
+        self.prefix = f'{name.capitalize()} ' if len(name) > 0 else ""
+        self.unique_id = f'{config_entry.data[CONF_HOST]}_{config_entry.data[CONF_PORT]}_Crafty_Controller'
+        self.entity_id = f'{self.prefix}Crafty Controller'
+        self.model = {kind: f'{self.prefix}{model}' for kind, (model, _, _) in GROUPS.items()}
+        self.group_name = {kind: group for kind, (_, group, _) in GROUPS.items()}
+        self.group_model = {kind: f'{self.prefix}{models}' for kind, (_, _, models) in GROUPS.items()}
+        self.via_device = {kind: f'{self.unique_id}_{self.group_name[kind]}_{self.group_model[kind]}' for kind in GROUPS}
 
-    @property
-    def unique_id(self) -> str:
-        return self._unique_id
+    def object_id(self, platform: str, name: str) -> str:
+        return f'{platform}.{self.entity_id} {name}'.lower().replace(" ", "_")
 
-    @property
-    def device_info(self) -> Dict[str, Any]:
-        return {
-            "identifiers": {(DOMAIN, self._unique_id)},
-            "name": self._name,
-            "model": self._model,
-            "manufacturer": self._manufacturer,
-        }
+@callback
+def async_track_items(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    coordinator: CraftyCoordinator,
+    async_add_entities: Callable,
+    builders: Dict[str, Callable[[Any], list[Entity]]],
+) -> None:
+    """Create the entities of every server, role or user as it appears in the coordinator data, and remove them with their devices once it is gone.
+
+    builders maps a kind ("server", "role", "user") to a function returning the entities of one id of it.
+    """
+    entities: Dict[tuple[str, Any], list[Entity]] = {}
+
+    @callback
+    def async_update_items() -> None:
+        # A failed refresh keeps the previous items, it never tells that one was deleted
+        if not coordinator.last_update_success or coordinator.data is None:
+            return
+        current = {(kind, id) for kind in builders for id in coordinator.data.ids(kind) if id}
+
+        added = []
+        for kind, id in current - entities.keys():
+            entities[(kind, id)] = builders[kind](id)
+            added.extend(entities[(kind, id)])
+        if added:
+            async_add_entities(added)
+
+        removed = entities.keys() - current
+        if not removed:
+            return
+        entity_registry = er.async_get(hass)
+        device_registry = dr.async_get(hass)
+        devices = set()
+        for context in removed:
+            for entity in entities.pop(context):
+                # Removing the device of an item may have taken this entity with it already
+                if (entry := entity_registry.async_get(entity.entity_id)) is None:
+                    continue
+                if entry.device_id:
+                    devices.add(entry.device_id)
+                entity_registry.async_remove(entity.entity_id)
+        for device_id in devices:
+            if not er.async_entries_for_device(entity_registry, device_id):
+                device_registry.async_update_device(device_id, remove_config_entry_id=config_entry.entry_id)
 
-class CraftySensorEntity(CoordinatorEntity[CraftyDataCoordinator], SensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry):
-        super().__init__(coordinator)
+    async_update_items()
+    config_entry.async_on_unload(coordinator.async_add_listener(async_update_items))
+
+class CraftyEntityMixin():
+    """Device, naming and availability shared by the entities of every platform, subclasses fill in the fields."""
+
+    def _init_fields(self, coordinator: CraftyCoordinator, config_entry: ConfigEntry) -> None:
         self._coordinator = coordinator
         self._host = config_entry.data[CONF_HOST]
         self._port = config_entry.data[CONF_PORT]
 
-        self._name = lambda x: f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller'
         self._device_name = ""
         self._model = ""
-        self._state = lambda x: None
-        self._attrs = lambda x: {}
         self._unique_id = f'{self._host}_{self._port}_Crafty_Controller'
-        self._unit = None
-        self._native_value = None
         self._icon = None
         self._attr_entity_category = None
-        self.entity_id = f'sensor.{self._name}'.lower().replace(" ", "_")
 
         self._manufacturer = "Crafty Controller"
         self._identifiers = lambda x: f'{x._host}_{x._port}_Crafty_Controller_{x._device_name}_{x._model}'
         self._via_device = None
         self._entry_type = None
+        self._written_state = None
+        self._values_data = None
 
+    def _update_values(self) -> None:
+        """Evaluate the value functions once for the current coordinator data into the _attr_ fields."""
+        data = self._coordinator.data
+        if data is self._values_data:
+            return
+        self._values_data = data
+        self._attr_name = self._name(data)
+        self._attr_extra_state_attributes = {"restored": True} if data.restored else None
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator_context not in self._coordinator.data.expired
 
     @property
     def name(self) -> str:
-        if callable(self._name):
-            return self._name(self._coordinator.data)
-        return self._name
+        self._update_values()
+        return self._attr_name
 
     @property
     def unique_id(self) -> str:
@@ -83,36 +137,9 @@ class CraftySensorEntity(CoordinatorEntity[CraftyDataCoordinator], SensorEntity)
         return self._unique_id
 
     @property
-    def icon(self):
-        if callable(self._icon):
-            return self._icon(self._coordinator.data)
-        return self._icon
-
-    @property
-    def unit_of_measurement(self):
-        if callable(self._unit):
-            return self._unit(self._coordinator.data)
-        return self._unit
-
-    @property
-    def native_value(self):
-        if callable(self._native_value):
-            return self._native_value(self._coordinator.data)
-        return self._native_value
-
-    @property
-    def state(self) -> Optional[str]:
-        if callable(self._state):
-            if type(self._state(self._coordinator.data)) == str:
-                return self._state(self._coordinator.data) if len(self._state(self._coordinator.data)) != 0 else None
-            return self._state(self._coordinator.data)
-        return self._state if len(self._state) != 0 else None
-
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        if callable(self._attrs):
-            return self._attrs(self._coordinator.data)
-        return self._attrs
+    def extra_state_attributes(self) -> Dict[str, Any] | None:
+        self._update_values()
+        return self._attr_extra_state_attributes
 
     @property
     def device_info(self) -> Dict[str, Any]:
@@ -128,56 +155,118 @@ class CraftySensorEntity(CoordinatorEntity[CraftyDataCoordinator], SensorEntity)
             info["entry_type"] = self._entry_type
         return info
 
-class CraftyButtonEntity(CoordinatorEntity[CraftyDataCoordinator], ButtonEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, hass: HomeAssistant):
-        super().__init__(coordinator)
-        self._coordinator = coordinator
-        self._host = config_entry.data[CONF_HOST]
-        self._port = config_entry.data[CONF_PORT]
-        self._hass = hass
+class CraftySensorEntity(CraftyEntityMixin, CoordinatorEntity[CraftyCoordinator], SensorEntity):
+    def __init__(self, coordinator: CraftyCoordinator, config_entry: ConfigEntry, context: tuple[str, Any] | None = None):
+        super().__init__(coordinator, context)
+        self._init_fields(coordinator, config_entry)
+        self._state = lambda x: None
+        self._attrs = lambda x: {}
+        self._unit = None
+        self._native_value = None
 
-        self._name = lambda x: f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller'
-        self._device_name = ""
-        self._model = ""
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller'
-        self._icon = None
-        self._attr_entity_category = None
-        self.entity_id = f'sensor.{self._name}'.lower().replace(" ", "_")
-        self._action = lambda x: None
-        self._manufacturer = "Crafty Controller"
-        self._identifiers = lambda x: f'{x._host}_{x._port}_Crafty_Controller_{x._device_name}_{x._model}'
+    def _update_values(self) -> None:
+        """Evaluate the value functions once for the current coordinator data into the _attr_ fields."""
+        data = self._coordinator.data
+        if data is self._values_data:
+            return
+        self._values_data = data
+        value = lambda x: x(data) if callable(x) else x
 
-        self._via_device = None
-        self._entry_type = None
+        self._attr_name = value(self._name)
+        self._attr_icon = value(self._icon)
+        self._attr_unit_of_measurement = value(self._unit)
+        self._attr_native_value = value(self._native_value)
+        state = value(self._state)
+        self._attr_state = None if type(state) == str and len(state) == 0 else state
+        attrs = value(self._attrs)
+        self._attr_extra_state_attributes = {**(attrs or {}), "restored": True} if data.restored else attrs
+
+    def _current_state(self) -> tuple:
+        self._update_values()
+        state = self._attr_state if self._native_value is None else self._attr_native_value
+        return (self.available, self._attr_name, state, self._attr_icon, self._attr_unit_of_measurement, self._attr_extra_state_attributes)
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Written right after this by Home Assistant itself
+        self._written_state = self._current_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        written_state = self._current_state()
+        if not self._significant(written_state):
+            return
+        self._written_state = written_state
+        self.async_write_ha_state()
+
+    def _significant(self, written_state: tuple) -> bool:
+        """Whether the state differs enough from the last written one to be written."""
+        return written_state != self._written_state
 
     @property
-    def name(self) -> str:
-        #Return the name of the sensor.#
-        return self._name(self._coordinator.data)
+    def icon(self):
+        self._update_values()
+        return self._attr_icon
 
     @property
-    def unique_id(self) -> str:
-        #Return the unique ID of the sensor.#
-        return self._unique_id
+    def unit_of_measurement(self):
+        if self._native_value is not None:
+            # Native values are converted by Home Assistant into the unit picked for the entity
+            return super().unit_of_measurement
+        self._update_values()
+        return self._attr_unit_of_measurement
 
     @property
-    def icon(self):
-        return self._icon
+    def native_value(self):
+        self._update_values()
+        return self._attr_native_value
 
     @property
-    def device_info(self) -> Dict[str, Any]:
-        info = {
-            "name": self._device_name,
-            "model": self._model,
-            "manufacturer": self._manufacturer,
-            "identifiers": {(DOMAIN, self._identifiers(self))},
-        }
-        if self._via_device is not None:
-            info["via_device"] = (DOMAIN, self._via_device)
-        if self._entry_type is not None:
-            info["entry_type"] = self._entry_type
-        return info
+    def state(self) -> Optional[str]:
+        if self._native_value is not None:
+            return super().state
+        self._update_values()
+        return self._attr_state
+
+class CraftyButtonEntity(CraftyEntityMixin, CoordinatorEntity[CraftyCoordinator], ButtonEntity):
+    def __init__(self, coordinator: CraftyCoordinator, config_entry: ConfigEntry, hass: HomeAssistant, context: tuple[str, Any] | None = None):
+        super().__init__(coordinator, context)
+        self._init_fields(coordinator, config_entry)
+        self._hass = hass
+        self._action = lambda x: None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._update_values()
+        written_state = (self.available, self._attr_name, self._attr_extra_state_attributes)
+        if written_state == self._written_state:
+            return
+        self._written_state = written_state
+        self.async_write_ha_state()
+
+    @property
+    def icon(self):
+        return self._icon
 
     async def async_press(self) -> None:
         #Press the button.#
-        await self._action(self._coordinator.data.get("client"))
\ No newline at end of file
+        await self._action(self._coordinator.client)
+
+class CraftyImageEntity(CraftyEntityMixin, CoordinatorEntity[CraftyCoordinator], ImageEntity):
+    def __init__(self, coordinator: CraftyCoordinator, config_entry: ConfigEntry, hass: HomeAssistant, context: tuple[str, Any] | None = None):
+        CoordinatorEntity.__init__(self, coordinator, context)
+        ImageEntity.__init__(self, hass)
+        self._init_fields(coordinator, config_entry)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._update_values()
+        written_state = (self.available, self._attr_name, self.image_last_updated, self._attr_extra_state_attributes)
+        if written_state == self._written_state:
+            return
+        self._written_state = written_state
+        self.async_write_ha_state()
+
+    @property
+    def icon(self):
+        return self._icon
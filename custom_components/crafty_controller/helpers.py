@@ -1,34 +1,82 @@
-from homeassistant.core import HomeAssistant
-from crafty_controller_api import Crafty
-from typing import Any, Dict
+import re
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from typing import Any
+
+from .api import CraftyClient
+from .const import DOMAIN
 
 import logging
 _LOGGER = logging.getLogger(__name__)
 
-def setup_client(
+def entry_option(config_entry: ConfigEntry, key: str, default: Any = None) -> Any:
+    """Options flow values take precedence over the ones given when the entry was created."""
+    return config_entry.options.get(key, config_entry.data.get(key, default))
+
+CLIENTS = f'{DOMAIN}_clients'
+TOKENS = f'{DOMAIN}_tokens'
+TOKENS_VERSION = 1
+TOKENS_SAVE_DELAY = 5
+
+async def _async_get_tokens(hass: HomeAssistant) -> tuple[Store, dict[str, str]]:
+    if TOKENS not in hass.data:
+        store = Store(hass, TOKENS_VERSION, f'{DOMAIN}.tokens', private=True)
+        hass.data[TOKENS] = (store, (await store.async_load()) or {})
+    return hass.data[TOKENS]
+
+async def async_setup_client(
+    hass: HomeAssistant,
     username: str,
     password: str,
     host: str,
     port: int,
     ssl: bool,
-    verify_ssl: bool
-) -> Crafty:
-    client = Crafty(host, port, ssl, verify_ssl, username, password)
+    verify_ssl: bool,
+    validate: bool = False,
+) -> CraftyClient:
+    """Return the shared client of this Crafty account, logging in only when no stored token exists.
+
+    validate forces a login with the given password, as the config flow needs, the token it
+    gets is then reused by the config entry.
+    """
+    key = f'{username}@{host}:{port}'
+    clients: dict[str, CraftyClient] = hass.data.setdefault(CLIENTS, {})
+    client = clients.get(key)
+    if client is not None and not validate and (client.password, client.ssl, client.verify_ssl) == (password, ssl, verify_ssl):
+        return client
+
+    store, tokens = await _async_get_tokens(hass)
+
+    @callback
+    def save_token(token: str) -> None:
+        tokens[key] = token
+        store.async_delay_save(lambda: tokens, TOKENS_SAVE_DELAY)
+
+    client = CraftyClient(hass, host, port, ssl, verify_ssl, username, password, None if validate else tokens.get(key), save_token)
+    if client.token is None:
+        await client.login()
+    clients[key] = client
     return client
 
-def find_dict(list, key, value, default = None):
-    for item in list:
-        if item.get(key) == value:
-            return item
-    return default
+async def async_remove_client(hass: HomeAssistant, username: str, host: str, port: int) -> None:
+    """Forget the shared client and stored token of a removed Crafty account."""
+    key = f'{username}@{host}:{port}'
+    hass.data.get(CLIENTS, {}).pop(key, None)
+    store, tokens = await _async_get_tokens(hass)
+    if tokens.pop(key, None) is not None:
+        await store.async_save(tokens)
+
+SIZE_PATTERN = re.compile(r"([\d.]+)\s*([a-zA-Z]+)")
+SIZE_UNITS = ["B", "KB", "MB", "GB", "TB", "PB"]
 
-def parse_size(input:str) -> tuple[float, str]:
-    import re
+def parse_size(input: str) -> int:
+    """Convert a Crafty size such as "1.2GB" into bytes."""
     try:
-        input_match = re.search(r"([\d.]+)([a-zA-Z]+)", input)
+        input_match = SIZE_PATTERN.search(input)
         input_value = float(input_match.group(1))
-        input_unit = str(input_match.group(2))
-        return (input_value, input_unit)
+        input_unit = input_match.group(2).upper()
+        return int(input_value * 1024 ** SIZE_UNITS.index(input_unit))
     except:
-        return (0.0, "B")
-        
\ No newline at end of file
+        return 0
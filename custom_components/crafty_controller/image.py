@@ -0,0 +1,80 @@
+from collections.abc import Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, FAMILY_USER_PICTURE
+from .coordinator import CraftyDataCoordinator, CraftyEntryData
+from .entity import CraftyEntryNames, CraftyImageEntity, async_track_items
+from .models import CraftySnapshot
+from .pictures import CraftyPictureCache
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: Callable,
+) -> None:
+    """Set up Crafty user pictures from config entry."""
+    data: CraftyEntryData = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = data.coordinator
+    selection = data.selection
+    if not selection.has(FAMILY_USER_PICTURE):
+        return
+
+    registry = er.async_get(hass)
+
+    def user_pictures(user_id: int) -> list[CraftyUserPictureImage]:
+        if not selection.user(user_id):
+            return []
+        image = CraftyUserPictureImage(coordinator, config_entry, hass, data.names, data.pictures, user_id)
+        # Pictures used to be published as sensor states, drop those entities
+        if entity_id := registry.async_get_entity_id("sensor", DOMAIN, image.unique_id):
+            registry.async_remove(entity_id)
+        return [image]
+
+    async_track_items(hass, config_entry, coordinator, async_add_entities, {"user": user_pictures})
+
+
+class CraftyUserPictureImage(CraftyImageEntity):
+    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, hass: HomeAssistant, names: CraftyEntryNames, pictures: CraftyPictureCache, user_id: int):
+        super().__init__(coordinator, config_entry, hass, ("user", user_id))
+        self._pictures = pictures
+        self._user_id = user_id
+
+        self._name = lambda x: f'{x.user_name(user_id)} Picture'
+        self._device_name = self._coordinator.data.user_name(user_id)
+        self._model = names.model["user"]
+        self._unique_id = f'{names.unique_id}_user_picture_{user_id}'
+        self._icon = "mdi:badge-account-horizontal"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self.entity_id = names.object_id("image", f'User Picture {user_id}')
+
+        self._via_device = names.via_device["user"]
+
+        self._picture = None
+        self._set_picture(self._coordinator.data)
+
+    def _set_picture(self, data: CraftySnapshot) -> None:
+        user = data.user(self._user_id)
+        picture = user.picture if user else None
+        if picture == self._picture:
+            return
+        self._picture = picture
+        self._attr_content_type = (self._pictures.content_type(picture) if picture else None) or "image/png"
+        self._attr_image_last_updated = dt_util.utcnow() if picture else None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._set_picture(self._coordinator.data)
+        super()._handle_coordinator_update()
+
+    async def async_image(self) -> bytes | None:
+        if self._picture is None:
+            return None
+        return await self._pictures.async_read(self._picture)
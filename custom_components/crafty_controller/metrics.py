@@ -0,0 +1,128 @@
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+import math
+import re
+import time
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+# Latency samples kept per endpoint, and refreshes kept per coordinator
+WINDOW = 256
+REFRESH_WINDOW = 32
+# Upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, math.inf]
+BUCKET_LABELS = [f'<={bound}' for bound in BUCKETS[:-1]] + [f'>{BUCKETS[-2]}']
+
+ENDPOINT_IDS = re.compile(r"^/(servers|roles|users)/[^/]+")
+
+def endpoint(method: str, path: str) -> str:
+    """Group requests by endpoint rather than by server, role or user, "GET /servers/{id}/stats"."""
+    return f'{method} {ENDPOINT_IDS.sub(lambda match: f"/{match.group(1)}/{{id}}", path)}'
+
+def percentile(samples: list[float], q: float) -> float | None:
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+@dataclass
+class RefreshMetrics:
+    """Requests made by one coordinator refresh, including those of the tasks it gathered."""
+    started: datetime = field(default_factory=dt_util.utcnow)
+    duration: float = 0
+    calls: int = 0
+    failures: int = 0
+    bytes: int = 0
+    success: bool = True
+    clock: float = field(default_factory=time.perf_counter, repr=False)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "started": self.started.isoformat(),
+            "duration": round(self.duration, 4),
+            "calls": self.calls,
+            "failures": self.failures,
+            "bytes": self.bytes,
+            "success": self.success,
+        }
+
+# Set while a coordinator refreshes, tasks started by the refresh inherit it
+CURRENT_REFRESH: ContextVar[RefreshMetrics | None] = ContextVar("crafty_refresh", default=None)
+
+@dataclass
+class EndpointMetrics:
+    calls: int = 0
+    failures: int = 0
+    bytes: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=WINDOW))
+
+    def as_dict(self) -> dict[str, Any]:
+        latencies = [latency * 1000 for latency in self.latencies]
+        histogram = dict.fromkeys(BUCKET_LABELS, 0)
+        for latency in latencies:
+            histogram[next(label for bound, label in zip(BUCKETS, BUCKET_LABELS) if latency <= bound)] += 1
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "bytes": self.bytes,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 0.5), 1) if latencies else None,
+                "p95": round(percentile(latencies, 0.95), 1) if latencies else None,
+                "max": round(max(latencies), 1) if latencies else None,
+                "histogram": histogram,
+            },
+        }
+
+class CraftyMetrics():
+    """Calls, failures, bytes and recent latencies of every Crafty endpoint a client used."""
+
+    def __init__(self) -> None:
+        self.endpoints: dict[str, EndpointMetrics] = {}
+
+    def record(self, name: str, latency: float, size: int, ok: bool) -> None:
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        metrics.calls += 1
+        metrics.failures += not ok
+        metrics.bytes += size
+        metrics.latencies.append(latency)
+
+        if (refresh := CURRENT_REFRESH.get()) is not None:
+            refresh.calls += 1
+            refresh.failures += not ok
+            refresh.bytes += size
+
+    def latency(self, q: float = 0.95) -> float | None:
+        """Percentile of the recent latencies of all endpoints together, in seconds."""
+        return percentile([latency for metrics in self.endpoints.values() for latency in metrics.latencies], q)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {name: metrics.as_dict() for name, metrics in sorted(self.endpoints.items())}
+
+class RefreshHistory():
+    """The last refreshes of a coordinator."""
+
+    def __init__(self) -> None:
+        self.refreshes: deque[RefreshMetrics] = deque(maxlen=REFRESH_WINDOW)
+
+    @property
+    def last(self) -> RefreshMetrics | None:
+        return self.refreshes[-1] if self.refreshes else None
+
+    def finish(self, refresh: RefreshMetrics, success: bool) -> None:
+        refresh.duration = time.perf_counter() - refresh.clock
+        refresh.success = success
+        self.refreshes.append(refresh)
+
+    def as_dict(self) -> dict[str, Any]:
+        durations = [refresh.duration for refresh in self.refreshes]
+        return {
+            "count": len(self.refreshes),
+            "duration_p50": round(percentile(durations, 0.5), 4) if durations else None,
+            "duration_p95": round(percentile(durations, 0.95), 4) if durations else None,
+            "recent": [refresh.as_dict() for refresh in self.refreshes],
+        }
@@ -0,0 +1,261 @@
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Any
+
+from .const import FAMILIES
+from .helpers import parse_size
+
+
+# Crafty sends the permissions of a role on a server as a string of 0/1 flags in this order
+PERMISSIONS = [
+    "Commands",
+    "Terminal",
+    "Logs",
+    "Schedule",
+    "Backup",
+    "Files",
+    "Config",
+    "Players"
+]
+
+def encode_permissions(permissions: str | int) -> int:
+    """Bitmask of a Crafty permissions string, bit n is set when flag n is "1"."""
+    if isinstance(permissions, int):
+        return permissions
+    return sum(1 << idx for idx, flag in enumerate(permissions or "") if flag == "1")
+
+def decode_permissions(mask: int) -> dict[str, bool]:
+    return {permission: bool(mask >> idx & 1) for idx, permission in enumerate(PERMISSIONS)}
+
+@dataclass(slots=True, frozen=True)
+class CraftySelection:
+    """Servers, roles and users left out by the options, and the entity families that are set up and fetched."""
+    excluded_servers: frozenset[str] = frozenset()
+    excluded_roles: frozenset[str] = frozenset()
+    excluded_users: frozenset[str] = frozenset()
+    families: frozenset[str] = frozenset(FAMILIES)
+
+    def server(self, id: str) -> bool:
+        return str(id) not in self.excluded_servers
+
+    def role(self, id: int) -> bool:
+        return str(id) not in self.excluded_roles
+
+    def user(self, id: int) -> bool:
+        return str(id) not in self.excluded_users
+
+    def has(self, *families: str) -> bool:
+        return not self.families.isdisjoint(families)
+
+def _from_dict(cls, data: dict[str, Any]) -> Any:
+    """Rebuild a record from its stored form, lists back to tuples."""
+    values = {}
+    for field in fields(cls):
+        if field.name not in data:
+            continue
+        value = data[field.name]
+        if isinstance(value, list):
+            value = tuple(tuple(item) if isinstance(item, list) else item for item in value)
+        values[field.name] = value
+    return cls(**values)
+
+@dataclass(slots=True, frozen=True)
+class ServerRecord:
+    server_id: str
+    server_name: str
+    running: bool = False
+    cpu: float = 0
+    mem: int = 0
+    mem_percent: float = 0
+    world_size: int = 0
+    online: int = 0
+    max: int = 0
+    version: Any = 0
+    accesses: tuple = ()
+    webhooks: tuple = ()
+
+    @classmethod
+    def from_api(cls, server: dict[str, Any], accesses: list | None = None, webhooks: list | None = None) -> "ServerRecord":
+        return cls(
+            server_id=server["server_id"],
+            server_name=server.get("server_name", server["server_id"]),
+            accesses=tuple(accesses or ()),
+            webhooks=tuple(webhooks or ()),
+        )
+
+    def with_stats(self, stats: dict[str, Any]) -> "ServerRecord":
+        """Return a copy carrying the values of a server_stats payload, sizes in bytes."""
+        return replace(
+            self,
+            server_name=(stats.get("server_id") or {}).get("server_name", self.server_name),
+            running=bool(stats.get("running", False)),
+            cpu=stats.get("cpu", 0),
+            mem=parse_size(stats.get("mem", "0")),
+            mem_percent=stats.get("mem_percent", 0),
+            world_size=parse_size(stats.get("world_size", "0")),
+            online=int(stats.get("online", 0) or 0),
+            max=int(stats.get("max", 0) or 0),
+            version=stats.get("version", 0),
+        )
+
+@dataclass(slots=True, frozen=True)
+class RoleRecord:
+    role_id: int
+    role_name: str
+    manager: int | None = None
+    # (server id, permissions bitmask)
+    servers: tuple[tuple[str, int], ...] = ()
+    users: tuple[int, ...] = ()
+
+    @classmethod
+    def from_api(cls, role: dict[str, Any], servers: list | None = None, users: list | None = None) -> "RoleRecord":
+        return cls(
+            role_id=role["role_id"],
+            role_name=role.get("role_name", role["role_id"]),
+            manager=role.get("manager"),
+            servers=tuple((server.get("server_id"), encode_permissions(server.get("permissions", ""))) for server in servers or ()),
+            users=tuple(users or ()),
+        )
+
+@dataclass(slots=True, frozen=True)
+class UserRecord:
+    user_id: int
+    username: str
+    created: str | None = None
+    last_login: str | None = None
+    last_update: str | None = None
+    last_ip: str | None = None
+    email: str | None = None
+    enabled: bool = False
+    superuser: bool = False
+    roles: tuple[int, ...] = ()
+    picture: str | None = None
+
+    @classmethod
+    def from_api(cls, user: dict[str, Any], picture: str | None = None) -> "UserRecord":
+        return cls(
+            user_id=user["user_id"],
+            username=user.get("username", user["user_id"]),
+            created=user.get("created"),
+            last_login=user.get("last_login"),
+            last_update=user.get("last_update"),
+            last_ip=user.get("last_ip"),
+            email=user.get("email"),
+            enabled=bool(user.get("enabled", False)),
+            superuser=bool(user.get("superuser", False)),
+            roles=tuple(role.get("role_id") if isinstance(role, dict) else role for role in user.get("roles") or ()),
+            picture=picture,
+        )
+
+
+class CraftySnapshot():
+    """Coordinator data with by-id and name indexes built once per refresh."""
+
+    __slots__ = (
+        "servers",
+        "roles",
+        "users",
+        "servers_by_id",
+        "roles_by_id",
+        "users_by_id",
+        "server_names",
+        "role_names",
+        "user_names",
+        "expired",
+        "restored",
+    )
+
+    def __init__(
+        self,
+        servers: list[ServerRecord] | None = None,
+        roles: list[RoleRecord] | None = None,
+        users: list[UserRecord] | None = None,
+        expired: set[tuple[str, Any]] | None = None,
+        restored: bool = False,
+    ) -> None:
+        self.restored = restored
+        self.servers = servers or []
+        self.roles = roles or []
+        self.users = users or []
+
+        self.servers_by_id = {server.server_id: server for server in self.servers}
+        self.roles_by_id = {role.role_id: role for role in self.roles}
+        self.users_by_id = {user.user_id: user for user in self.users}
+
+        self.server_names = {id: server.server_name for id, server in self.servers_by_id.items()}
+        self.role_names = {id: role.role_name for id, role in self.roles_by_id.items()}
+        self.user_names = {id: user.username for id, user in self.users_by_id.items()}
+
+        # Contexts served from a cache older than the staleness limit, (kind, None) expires the whole kind
+        self.expired = set()
+        for kind, id in expired or ():
+            if id is not None:
+                self.expired.add((kind, id))
+                continue
+            ids = {"server": self.servers_by_id, "role": self.roles_by_id, "user": self.users_by_id}.get(kind, {})
+            self.expired.update((kind, id) for id in ids)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "servers": [asdict(server) for server in self.servers],
+            "roles": [asdict(role) for role in self.roles],
+            "users": [asdict(user) for user in self.users],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "CraftySnapshot":
+        """Rebuild a snapshot saved by as_dict, flagged as restored until live data replaces it."""
+        return cls(
+            servers=[_from_dict(ServerRecord, server) for server in data.get("servers", [])],
+            # Snapshots saved before permissions became bitmasks carry the strings
+            roles=[replace(role, servers=tuple((id, encode_permissions(permissions)) for id, permissions in role.servers)) for role in (_from_dict(RoleRecord, role) for role in data.get("roles", []))],
+            users=[_from_dict(UserRecord, user) for user in data.get("users", [])],
+            restored=True,
+        )
+
+    def ids(self, kind: str) -> set[Any]:
+        return set({"server": self.servers_by_id, "role": self.roles_by_id, "user": self.users_by_id}[kind])
+
+    def item(self, kind: str, id: Any) -> ServerRecord | RoleRecord | UserRecord | None:
+        return {"server": self.servers_by_id, "role": self.roles_by_id, "user": self.users_by_id}[kind].get(id)
+
+    def name(self, kind: str, id: Any) -> str:
+        return {"server": self.server_names, "role": self.role_names, "user": self.user_names}[kind].get(id, id)
+
+    def server(self, id: str) -> ServerRecord | None:
+        return self.servers_by_id.get(id)
+
+    def role(self, id: int) -> RoleRecord | None:
+        return self.roles_by_id.get(id)
+
+    def user(self, id: int) -> UserRecord | None:
+        return self.users_by_id.get(id)
+
+    def server_name(self, id: str) -> str:
+        return self.server_names.get(id, id)
+
+    def role_name(self, id: int) -> str:
+        return self.role_names.get(id, id)
+
+    def user_name(self, id: int) -> str:
+        return self.user_names.get(id, id)
+
+    def changed_contexts(self, previous: "CraftySnapshot | None") -> set[tuple[str, Any]] | None:
+        """Return the (kind, id) contexts whose records differ from the previous snapshot, None when everything did."""
+        if previous is None or self.restored != previous.restored:
+            return None
+        changed = set()
+        for kind, current, old in (
+            ("server", self.servers_by_id, previous.servers_by_id),
+            ("role", self.roles_by_id, previous.roles_by_id),
+            ("user", self.users_by_id, previous.users_by_id),
+        ):
+            for id in current.keys() | old.keys():
+                if current.get(id) != old.get(id):
+                    changed.add((kind, id))
+        changed.update(self.expired ^ previous.expired)
+        # Role sensors show user and server names, user sensors show role names
+        if self.user_names != previous.user_names or self.server_names != previous.server_names:
+            changed.update(("role", id) for id in self.roles_by_id)
+        if self.role_names != previous.role_names:
+            changed.update(("user", id) for id in self.users_by_id)
+        return changed
@@ -0,0 +1,98 @@
+from hashlib import sha256
+from pathlib import Path
+import shutil
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+
+from .api import CraftyClient
+from .const import DOMAIN
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+class CraftyPictureCache():
+    """User pictures stored on disk by content hash, indexed by the url Crafty reports."""
+
+    def __init__(self, hass: HomeAssistant, client: CraftyClient, entry_id: str) -> None:
+        self._hass = hass
+        self._client = client
+        self._directory = Path(hass.config.path(STORAGE_DIR, DOMAIN, entry_id, "pictures"))
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, f'{DOMAIN}.{entry_id}.pictures')
+        # url -> {"hash", "etag", "content_type"}
+        self._urls: dict[str, dict[str, Any]] = {}
+        self._content_types: dict[str, str] = {}
+
+    async def async_load(self) -> None:
+        urls = (await self._store.async_load()) or {}
+        present = await self._hass.async_add_executor_job(self._present)
+        self._urls = {url: entry for url, entry in urls.items() if entry["hash"] in present}
+        self._content_types = {entry["hash"]: entry["content_type"] for entry in self._urls.values()}
+
+    def content_type(self, hash: str) -> str | None:
+        return self._content_types.get(hash)
+
+    async def async_fetch(self, url: str | None) -> str | None:
+        """Return the content hash of the picture at url, downloading it only when it changed."""
+        if not url:
+            return None
+        cached = self._urls.get(url)
+        try:
+            body, content_type, etag = await self._client.download(url, cached.get("etag") if cached else None)
+        except Exception as err:
+            _LOGGER.debug("Failed to download picture %s: %s", url, err)
+            return cached["hash"] if cached else None
+        if body is None and cached:
+            return cached["hash"]
+        if not body:
+            return None
+
+        hash = sha256(body).hexdigest()
+        await self._hass.async_add_executor_job(self._write, hash, body)
+        self._urls[url] = {"hash": hash, "etag": etag, "content_type": content_type}
+        self._content_types[hash] = content_type
+        return hash
+
+    async def async_read(self, hash: str) -> bytes | None:
+        return await self._hass.async_add_executor_job(self._read, hash)
+
+    async def async_save(self, hashes: set[str]) -> None:
+        """Persist the index and drop pictures no user references anymore."""
+        self._urls = {url: entry for url, entry in self._urls.items() if entry["hash"] in hashes}
+        self._content_types = {hash: content_type for hash, content_type in self._content_types.items() if hash in hashes}
+        self._store.async_delay_save(lambda: self._urls, SAVE_DELAY)
+        await self._hass.async_add_executor_job(self._prune, hashes)
+
+    def _write(self, hash: str, body: bytes) -> None:
+        path = self._directory / hash
+        if path.exists():
+            return
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+
+    def _read(self, hash: str) -> bytes | None:
+        try:
+            return (self._directory / hash).read_bytes()
+        except OSError:
+            return None
+
+    def _present(self) -> set[str]:
+        if not self._directory.is_dir():
+            return set()
+        return {path.name for path in self._directory.iterdir()}
+
+    def _prune(self, hashes: set[str]) -> None:
+        if not self._directory.is_dir():
+            return
+        for path in self._directory.iterdir():
+            if path.name not in hashes:
+                path.unlink(missing_ok=True)
+
+async def async_remove_pictures(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the cached pictures and their index of a deleted config entry."""
+    await Store(hass, STORAGE_VERSION, f'{DOMAIN}.{entry_id}.pictures').async_remove()
+    await hass.async_add_executor_job(shutil.rmtree, hass.config.path(STORAGE_DIR, DOMAIN, entry_id), True)
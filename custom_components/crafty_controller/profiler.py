@@ -0,0 +1,99 @@
+import asyncio
+import cProfile
+from pathlib import Path
+import pstats
+import time
+import tracemalloc
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .coordinator import CraftyCoordinator
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_LOCK = f'{DOMAIN}_profile'
+# Stack depth recorded per allocation when the profile starts tracemalloc itself
+TRACEMALLOC_FRAMES = 5
+SORT_KEYS = {"tottime": 2, "cumtime": 3}
+
+def _location(file: str, line: int, function: str) -> str:
+    if file == "~":
+        return function
+    return f'{"/".join(Path(file).parts[-2:])}:{line}({function})'
+
+def _report(path: str, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot | None, top: int, sort: str) -> dict[str, Any]:
+    """Write the pstats file and allocation snapshot, and summarize the top entries of both."""
+    profiler.dump_stats(f'{path}.pstats')
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][SORT_KEYS[sort]], reverse=True)[:top]
+    report = {
+        "pstats": f'{path}.pstats',
+        "functions": [
+            {"function": _location(*function), "calls": calls, "tottime": round(tottime, 4), "cumtime": round(cumtime, 4)}
+            for function, (_, calls, tottime, cumtime, _) in rows
+        ],
+    }
+    if snapshot is not None:
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+        snapshot.dump(f'{path}.tracemalloc')
+        report["tracemalloc"] = f'{path}.tracemalloc'
+        report["allocations"] = [
+            {"location": _location(frame.filename, frame.lineno, ""), "size_kib": round(stat.size / 1024, 1), "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:top]
+            for frame in stat.traceback[:1]
+        ]
+    return report
+
+async def async_profile(
+    hass: HomeAssistant,
+    coordinators: list[CraftyCoordinator],
+    refreshes: int = 1,
+    memory: bool = False,
+    top: int = 15,
+    sort: str = "tottime",
+) -> dict[str, Any]:
+    """Run cProfile, and tracemalloc when memory is set, across refreshes of the coordinators, one after another.
+
+    Listeners are woken inside a refresh, so the entity updates it triggers are part of the profile, as is
+    anything else the event loop runs meanwhile. Files are written to the config directory.
+    """
+    lock: asyncio.Lock = hass.data.setdefault(PROFILE_LOCK, asyncio.Lock())
+    if lock.locked():
+        raise ServiceValidationError("A Crafty Controller profile is already running")
+    async with lock:
+        path = hass.config.path(f'{DOMAIN}_profile_{dt_util.utcnow().strftime("%Y%m%d_%H%M%S")}')
+        started_tracing = memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        profiler = cProfile.Profile()
+        snapshot = None
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError as err:
+            # Only one profiler can be active at a time, e.g. the one of the Profiler integration
+            if started_tracing:
+                tracemalloc.stop()
+            raise ServiceValidationError(f'Another profiler is already running: {err}') from err
+        try:
+            for _ in range(refreshes):
+                for coordinator in coordinators:
+                    await coordinator.async_refresh()
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - start
+            try:
+                if memory:
+                    snapshot = await hass.async_add_executor_job(tracemalloc.take_snapshot)
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+
+        report = await hass.async_add_executor_job(_report, path, profiler, snapshot, top, sort)
+        _LOGGER.info("Profiled %s refreshes of %s in %.2f seconds, written to %s", refreshes, ", ".join(coordinator.name for coordinator in coordinators), duration, report["pstats"])
+        return {"refreshes": refreshes, "duration": round(duration, 3), **report}
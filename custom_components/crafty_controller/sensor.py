@@ -1,572 +1,632 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict
 from collections.abc import Callable
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import timedelta
 
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.device_registry import DeviceEntryType
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntityDescription, SensorStateClass
 from homeassistant.const import (
-    CONF_NAME, 
-    CONF_HOST,
-    CONF_PORT,
     EntityCategory,
+    UnitOfInformation,
+    UnitOfTime,
     )
 
-from .const import DOMAIN
-from .coordinator import CraftyDataCoordinator
+from .const import (
+    DOMAIN,
+    CONF_MAX_QUIET_TIME,
+    CONF_COMPACT_ATTRIBUTES,
+    DEFAULT_MAX_QUIET_TIME,
+    DEFAULT_COMPACT_ATTRIBUTES,
+    FAMILY_SERVER_STATS,
+    FAMILY_SERVER_BUTTONS,
+    FAMILY_ROLE_USERS,
+    FAMILY_ROLE_MANAGER,
+    FAMILY_ROLE_PERMISSIONS,
+    FAMILY_USER_ACTIVITY,
+    FAMILY_USER_ACCOUNT,
+    FAMILY_USER_IP,
+    FAMILY_USER_EMAIL,
+    )
+from .actions import CraftyActionQueue
+from .coordinator import CraftyCoordinator, CraftyEntryData
 from .entity import (
+    CraftyEntryNames,
     CraftySensorEntity,
-    CraftyServiceEntity,
+    async_track_items,
     )
-from .helpers import find_dict, parse_size
-
-def is_online(data: dict[str, Any]) -> bool:
-    for key, value in data.items():
-        if type(value) == dict and len(value.keys()) > 0:
-            return True
-        if type(value) == list and len(value) > 0:
-            return True
-
-    return False
-
-async def awaiting_coroutine(hass, cor):
-    return await hass.async_add_executor_job(cor)
+from .helpers import entry_option
+from .models import CraftySnapshot, decode_permissions
 
 import logging
 _LOGGER = logging.getLogger(__name__)
 
-async def async_setup_entry(
-    hass: HomeAssistant,
-    config_entry: ConfigEntry,
-    async_add_entities: Callable,
-) -> None:
-    coordinator: CraftyDataCoordinator = hass.data[DOMAIN][config_entry.entry_id]
-
-    servers = []
-    servers.append(CraftyStateNumbersServersSensor(coordinator, config_entry, True))
-    servers.append(CraftyStateNumbersServersSensor(coordinator, config_entry))
-    for server in coordinator.data.get("servers"):
-        if server.get("server_id"):
-            servers.append(CraftyServerStateSensor(coordinator, config_entry, server["server_id"]))
-            servers.append(CraftyServerCPUSensor(coordinator, config_entry, server["server_id"]))
-            servers.append(CraftyServerMemSensor(coordinator, config_entry, server["server_id"]))
-            servers.append(CraftyServerMemPercentSensor(coordinator, config_entry, server["server_id"]))
-            servers.append(CraftyServerWorldSizeSensor(coordinator, config_entry, server["server_id"]))
-            servers.append(CraftyServerPlayersOnlineSensor(coordinator, config_entry, server["server_id"]))
-            servers.append(CraftyServerPlayersMaxSensor(coordinator, config_entry, server["server_id"]))
-            servers.append(CraftyServerPlayersUsageSensor(coordinator, config_entry, server["server_id"]))
-            servers.append(CraftyServerVersionSensor(coordinator, config_entry, server["server_id"]))
-
-    roles = []
-    servers.append(CraftyNumbersRolesSensor(coordinator, config_entry))
-    for role in coordinator.data.get("roles"):
-        if role.get("role_id"):
-            roles.append(CraftyRoleSensor(coordinator, config_entry, role["role_id"]))
-            roles.append(CraftyRoleManagerSensor(coordinator, config_entry, role["role_id"]))
-            roles.append(CraftyRoleServerStatsSensor(coordinator, config_entry, role["role_id"]))
-
-    users = []
-    users.append(CraftyNumbersUsersSensor(coordinator, config_entry))
-    for user in coordinator.data.get("users"):
-        if user.get("user_id"):
-            users.append(CraftyUserCreatedSensor(coordinator, config_entry, user["user_id"]))
-            users.append(CraftyUserLoginSensor(coordinator, config_entry, user["user_id"]))
-            users.append(CraftyUserUpdateSensor(coordinator, config_entry, user["user_id"]))
-            users.append(CraftyUserIPSensor(coordinator, config_entry, user["user_id"]))
-            users.append(CraftyUserEmailSensor(coordinator, config_entry, user["user_id"]))
-            users.append(CraftyUserEnabledSensor(coordinator, config_entry, user["user_id"]))
-            users.append(CraftyUserSuperSensor(coordinator, config_entry, user["user_id"]))
-            users.append(CraftyUserRolesSensor(coordinator, config_entry, user["user_id"]))
-            users.append(CraftyUserPictureSensor(coordinator, config_entry, user["user_id"]))
-
-    async_add_entities(servers + roles + users, update_before_add=True)
-
-class CraftyStateNumbersServersSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, type: bool = False):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = f'Servers {"Online" if type else "Offline"}'
-        self._device_name = "All Servers"
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Servers'
-        self._state = lambda x: len([server for server in x.get("servers") if server.get("running") == type])
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_servers_{"online" if type else "offline"}'
-        self._icon = "mdi:cloud-outline" if type else "mdi:cloud-off-outline"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        self.state_class = SensorStateClass.MEASUREMENT
-        
-        self._entry_type = DeviceEntryType.SERVICE
-
-class CraftyServerStateSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, server_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(x.get("servers"), "server_id", server_id) else server_id} state'
-        self._device_name = find_dict(self._coordinator.data.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(self._coordinator.data.get("servers"), "server_id", server_id) else server_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Server'
-        self._state = lambda x: ("Online" if find_dict(x.get("servers"), "server_id", server_id).get("running") else "Offline") if find_dict(x.get("servers"), "server_id", server_id) else None
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_server_state_{server_id}'
-        self._icon = lambda x: "mdi:server" if self._state(x) == "Online" else "mdi:server-off"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Server State {server_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Servers"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Servers'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyServerCPUSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, server_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(x.get("servers"), "server_id", server_id) else server_id} CPU'
-        self._device_name = find_dict(self._coordinator.data.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(self._coordinator.data.get("servers"), "server_id", server_id) else server_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Server'
-        self._state = lambda x: (find_dict(x.get("servers"), "server_id", server_id).get("cpu", 0)) if find_dict(x.get("servers"), "server_id", server_id) else 0
-        self._unit = "%"
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_server_cpu_{server_id}'
-        self._icon = "mdi:cpu-64-bit"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Server CPU {server_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Servers"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Servers'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyServerMemSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, server_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(x.get("servers"), "server_id", server_id) else server_id} Memory'
-        self._device_name = find_dict(self._coordinator.data.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(self._coordinator.data.get("servers"), "server_id", server_id) else server_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Server'
-        self._state = lambda x: parse_size(find_dict(x.get("servers"), "server_id", server_id).get("mem", "0"))[0] if find_dict(x.get("servers"), "server_id", server_id) else 0
-        self._unit = lambda x: parse_size(find_dict(x.get("servers"), "server_id", server_id).get("mem", "0"))[1] if find_dict(x.get("servers"), "server_id", server_id) else "B"
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_server_mem_{server_id}'
-        self._icon = "mdi:memory"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Server Memory {server_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Servers"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Servers'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyServerMemPercentSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, server_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(x.get("servers"), "server_id", server_id) else server_id} Memory usage'
-        self._device_name = find_dict(self._coordinator.data.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(self._coordinator.data.get("servers"), "server_id", server_id) else server_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Server'
-        self._state = lambda x: (find_dict(x.get("servers"), "server_id", server_id).get("mem_percent", 0)) if find_dict(x.get("servers"), "server_id", server_id) else 0
-        self._unit = "%"
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_server_mem_usage_{server_id}'
-        self._icon = "mdi:memory"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Server Memory usage {server_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Servers"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Servers'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyServerWorldSizeSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, server_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(x.get("servers"), "server_id", server_id) else server_id} World size'
-        self._device_name = find_dict(self._coordinator.data.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(self._coordinator.data.get("servers"), "server_id", server_id) else server_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Server'
-        self._state = lambda x: parse_size(find_dict(x.get("servers"), "server_id", server_id).get("world_size", "0"))[0] if find_dict(x.get("servers"), "server_id", server_id) else 0
-        self._unit = lambda x: parse_size(find_dict(x.get("servers"), "server_id", server_id).get("world_size", "0"))[1] if find_dict(x.get("servers"), "server_id", server_id) else "B"
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_server_world_size_{server_id}'
-        self._icon = "mdi:earth"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Server World size {server_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Servers"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Servers'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyServerPlayersOnlineSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, server_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(x.get("servers"), "server_id", server_id) else server_id} Number of players'
-        self._device_name = find_dict(self._coordinator.data.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(self._coordinator.data.get("servers"), "server_id", server_id) else server_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Server'
-        self._state = lambda x: int((find_dict(x.get("servers"), "server_id", server_id).get("online", 0)) if find_dict(x.get("servers"), "server_id", server_id) else 0)
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_server_number_of_players_{server_id}'
-        self._icon = "mdi:account"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Server Number of players {server_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-        self.state_class = SensorStateClass.MEASUREMENT
-
-        via_device_name = "All Servers"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Servers'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyServerPlayersMaxSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, server_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(x.get("servers"), "server_id", server_id) else server_id} Max players'
-        self._device_name = find_dict(self._coordinator.data.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(self._coordinator.data.get("servers"), "server_id", server_id) else server_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Server'
-        self._state = lambda x: int((find_dict(x.get("servers"), "server_id", server_id).get("max", 0)) if find_dict(x.get("servers"), "server_id", server_id) else 0)
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_server_max_players_{server_id}'
-        self._icon = "mdi:account-group"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Server Max players {server_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-        self.state_class = SensorStateClass.MEASUREMENT
-
-        via_device_name = "All Servers"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Servers'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyServerPlayersUsageSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, server_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(x.get("servers"), "server_id", server_id) else server_id} Player usage'
-        self._device_name = find_dict(self._coordinator.data.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(self._coordinator.data.get("servers"), "server_id", server_id) else server_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Server'
-        self._state = lambda x: ((find_dict(x.get("servers"), "server_id", server_id).get("online", 0)) / find_dict(x.get("servers"), "server_id", server_id).get("max", 0)) if find_dict(x.get("servers"), "server_id", server_id) and find_dict(x.get("servers"), "server_id", server_id).get("max", 0) != 0 else 0
-        self._unit = "%"
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_server_player_usage_{server_id}'
-        self._icon = "mdi:account-question"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Server Player usage {server_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Servers"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Servers'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyServerVersionSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, server_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(x.get("servers"), "server_id", server_id) else server_id} Version'
-        self._device_name = find_dict(self._coordinator.data.get("servers"), "server_id", server_id).get("server_name", server_id) if find_dict(self._coordinator.data.get("servers"), "server_id", server_id) else server_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Server'
-        self._state = lambda x: (find_dict(x.get("servers"), "server_id", server_id).get("version", 0)) if find_dict(x.get("servers"), "server_id", server_id) else 0
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_server_version_{server_id}'
-        self._icon = "mdi:information"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Server Version {server_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Servers"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Servers'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-
-class CraftyNumbersRolesSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, type: bool = False):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = "Roles"
-        self._device_name = "All Roles"
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Roles'
-        self._state = lambda x: len(x.get("roles", []))
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_roles'
-        self._icon = "mdi:account-circle"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        self.state_class = SensorStateClass.MEASUREMENT
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Roles'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        self._entry_type = DeviceEntryType.SERVICE
-
-def find_user(users: list, id: int) -> str:
-    for user in users:
-        if user.get("user_id") == id:
-            return user.get("username")
-    return id
-
-def find_role(roles: list, id: int) -> str:
-    for role in roles:
-        if role.get("role_id") == id:
-            return role.get("role_name")
-    return id
-
-def find_server(servers: list, id: int) -> str:
-    return find_dict(servers, "server_id", id).get("server_name", id) if find_dict(servers, "server_id", id) else id
-
-class CraftyRoleSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, role_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("roles"), "role_id", role_id).get("role_name", role_id) if find_dict(x.get("roles"), "role_id", role_id) else role_id} Users'
-        self._device_name = find_dict(self._coordinator.data.get("roles"), "role_id", role_id).get("role_name", role_id) if find_dict(self._coordinator.data.get("roles"), "role_id", role_id) else role_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Role'
-        self._state = lambda x: len(find_dict(x.get("roles"), "role_id", role_id).get("users", [])) if find_dict(x.get("roles"), "role_id", role_id) else None
-        self._attrs = lambda x: {"Users": [find_user(x.get("users"), user_id) for user_id in find_dict(x.get("roles"), "role_id", role_id).get("users", [])]}
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_role_users_{role_id}'
-        self._icon = "mdi:account-group"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Role Users {role_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Roles"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Roles'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyRoleManagerSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, role_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("roles"), "role_id", role_id).get("role_name", role_id) if find_dict(x.get("roles"), "role_id", role_id) else role_id} Manager'
-        self._device_name = find_dict(self._coordinator.data.get("roles"), "role_id", role_id).get("role_name", role_id) if find_dict(self._coordinator.data.get("roles"), "role_id", role_id) else role_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Role'
-        self._state = lambda x: find_user(x.get("users"), find_dict(x.get("roles"), "role_id", role_id).get("manager", None)) if find_dict(x.get("roles"), "role_id", role_id) else None
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_role_manager_{role_id}'
-        self._icon = "mdi:shield-account"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Role manager {role_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Roles"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Roles'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-permission_list = [
-    "Commands",
-    "Terminal",
-    "Logs",
-    "Schedule",
-    "Backup",
-    "Files",
-    "Config",
-    "Players"
+@dataclass(frozen=True, kw_only=True)
+class CraftySensorEntityDescription(SensorEntityDescription):
+    """A sensor of every server, role or user, or a total over them when built without an id.
+
+    The value, icon and attribute functions get the snapshot and the record of the item (None for totals),
+    name_fn gets the name of the item. key is the part of the unique id before the item id and object_id the
+    part of the entity id.
+
+    Values with a suggested unit are native values, converted by Home Assistant into the unit picked for the
+    entity.
+
+    Changes of a numeric state within deadband, or within relative_deadband times the last written state, are
+    only written once the max quiet time of the entry passed since the last write.
+
+    compact_attrs_fn replaces attrs_fn in compact mode, giving ids and permission bitmasks instead of names and
+    decoded permissions.
+    """
+    kind: str
+    family: str | None = None
+    object_id: str | None = None
+    name_fn: Callable[[str], str] | None = None
+    value_fn: Callable[[CraftySnapshot, Any], Any]
+    icon_fn: Callable[[CraftySnapshot, Any], str] | None = None
+    attrs_fn: Callable[[CraftySnapshot, Any], Dict[str, Any]] | None = None
+    compact_attrs_fn: Callable[[CraftySnapshot, Any], Dict[str, Any]] | None = None
+    entity_category: EntityCategory | None = EntityCategory.DIAGNOSTIC
+    deadband: float = 0
+    relative_deadband: float = 0
+
+TOTAL_SENSORS = [
+    CraftySensorEntityDescription(
+        key="servers_online",
+        kind="server",
+        family=FAMILY_SERVER_STATS,
+        name="Servers Online",
+        object_id="Servers Online",
+        value_fn=lambda x, _: len([server for server in x.servers if server.running]),
+        icon="mdi:cloud-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    CraftySensorEntityDescription(
+        key="servers_offline",
+        kind="server",
+        family=FAMILY_SERVER_STATS,
+        name="Servers Offline",
+        object_id="Servers Offline",
+        value_fn=lambda x, _: len([server for server in x.servers if not server.running]),
+        icon="mdi:cloud-off-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    CraftySensorEntityDescription(
+        key="roles",
+        kind="role",
+        object_id="Roles",
+        name="Roles",
+        value_fn=lambda x, _: len(x.roles),
+        icon="mdi:account-circle",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    CraftySensorEntityDescription(
+        key="users",
+        kind="user",
+        # The users total has always shared the entity id of the roles one, registered entities keep theirs
+        object_id="Roles",
+        name="Users",
+        value_fn=lambda x, _: len(x.users),
+        icon="mdi:account-group",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
 ]
 
-class CraftyRoleServerStatsSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, role_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("roles"), "role_id", role_id).get("role_name", role_id) if find_dict(x.get("roles"), "role_id", role_id) else role_id} Server access'
-        self._device_name = find_dict(self._coordinator.data.get("roles"), "role_id", role_id).get("role_name", role_id) if find_dict(self._coordinator.data.get("roles"), "role_id", role_id) else role_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Role'
-        self._state = lambda x: len(find_dict(x.get("roles"), "role_id", role_id).get("servers", [])) if find_dict(x.get("roles"), "role_id", role_id) else None
-        self._attrs = lambda x: {find_server(self._coordinator.data.get("servers"), server.get("server_id")): {permission_list[idx]: int(permission) == 1 for idx, permission in enumerate([*server.get("permissions", "")])} for server in find_dict(x.get("roles"), "role_id", role_id).get("servers", [])}
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_role_server_access_{role_id}'
-        self._icon = "mdi:server-security"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Role Server access {role_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
+SERVER_SENSORS = [
+    CraftySensorEntityDescription(
+        key="server_state",
+        kind="server",
+        family=FAMILY_SERVER_STATS,
+        object_id="Server State",
+        name_fn=lambda name: f'{name} state',
+        value_fn=lambda x, server: ("Online" if server.running else "Offline") if server else None,
+        icon_fn=lambda x, server: "mdi:server" if server and server.running else "mdi:server-off",
+    ),
+    CraftySensorEntityDescription(
+        key="server_cpu",
+        kind="server",
+        family=FAMILY_SERVER_STATS,
+        object_id="Server CPU",
+        name_fn=lambda name: f'{name} CPU',
+        value_fn=lambda x, server: server.cpu if server else 0,
+        native_unit_of_measurement="%",
+        icon="mdi:cpu-64-bit",
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=1,
+    ),
+    CraftySensorEntityDescription(
+        key="server_mem",
+        kind="server",
+        family=FAMILY_SERVER_STATS,
+        object_id="Server Memory",
+        name_fn=lambda name: f'{name} Memory',
+        value_fn=lambda x, server: server.mem if server else 0,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.GIBIBYTES,
+        suggested_display_precision=1,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:memory",
+        relative_deadband=0.02,
+    ),
+    CraftySensorEntityDescription(
+        key="server_mem_usage",
+        kind="server",
+        family=FAMILY_SERVER_STATS,
+        object_id="Server Memory usage",
+        name_fn=lambda name: f'{name} Memory usage',
+        value_fn=lambda x, server: server.mem_percent if server else 0,
+        native_unit_of_measurement="%",
+        icon="mdi:memory",
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=1,
+    ),
+    CraftySensorEntityDescription(
+        key="server_world_size",
+        kind="server",
+        family=FAMILY_SERVER_STATS,
+        object_id="Server World size",
+        name_fn=lambda name: f'{name} World size',
+        value_fn=lambda x, server: server.world_size if server else 0,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.MEBIBYTES,
+        suggested_display_precision=1,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:earth",
+        relative_deadband=0.01,
+    ),
+    CraftySensorEntityDescription(
+        key="server_number_of_players",
+        kind="server",
+        family=FAMILY_SERVER_STATS,
+        object_id="Server Number of players",
+        name_fn=lambda name: f'{name} Number of players',
+        value_fn=lambda x, server: server.online if server else 0,
+        icon="mdi:account",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    CraftySensorEntityDescription(
+        key="server_max_players",
+        kind="server",
+        family=FAMILY_SERVER_STATS,
+        object_id="Server Max players",
+        name_fn=lambda name: f'{name} Max players',
+        value_fn=lambda x, server: server.max if server else 0,
+        icon="mdi:account-group",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    CraftySensorEntityDescription(
+        key="server_player_usage",
+        kind="server",
+        family=FAMILY_SERVER_STATS,
+        object_id="Server Player usage",
+        name_fn=lambda name: f'{name} Player usage',
+        value_fn=lambda x, server: round(server.online / server.max * 100, 1) if server and server.max != 0 else 0,
+        native_unit_of_measurement="%",
+        icon="mdi:account-question",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    CraftySensorEntityDescription(
+        key="server_version",
+        kind="server",
+        family=FAMILY_SERVER_STATS,
+        object_id="Server Version",
+        name_fn=lambda name: f'{name} Version',
+        value_fn=lambda x, server: server.version if server else 0,
+        icon="mdi:information",
+    ),
+]
 
-        via_device_name = "All Roles"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Roles'
+ROLE_SENSORS = [
+    CraftySensorEntityDescription(
+        key="role_users",
+        kind="role",
+        family=FAMILY_ROLE_USERS,
+        object_id="Role Users",
+        name_fn=lambda name: f'{name} Users',
+        value_fn=lambda x, role: len(role.users) if role else None,
+        attrs_fn=lambda x, role: {"Users": [x.user_name(user_id) for user_id in role.users]} if role else {},
+        compact_attrs_fn=lambda x, role: {"user_ids": list(role.users)} if role else {},
+        icon="mdi:account-group",
+    ),
+    CraftySensorEntityDescription(
+        key="role_manager",
+        kind="role",
+        family=FAMILY_ROLE_MANAGER,
+        object_id="Role manager",
+        name_fn=lambda name: f'{name} Manager',
+        value_fn=lambda x, role: x.user_name(role.manager) if role else None,
+        icon="mdi:shield-account",
+    ),
+    CraftySensorEntityDescription(
+        key="role_server_access",
+        kind="role",
+        family=FAMILY_ROLE_PERMISSIONS,
+        object_id="Role Server access",
+        name_fn=lambda name: f'{name} Server access',
+        value_fn=lambda x, role: len(role.servers) if role else None,
+        attrs_fn=lambda x, role: {x.server_name(server_id): decode_permissions(mask) for server_id, mask in role.servers} if role else {},
+        compact_attrs_fn=lambda x, role: {"permissions": dict(role.servers)} if role else {},
+        icon="mdi:server-security",
+    ),
+]
 
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
+USER_SENSORS = [
+    CraftySensorEntityDescription(
+        key="user",
+        kind="user",
+        family=FAMILY_USER_ACTIVITY,
+        object_id="User",
+        name_fn=lambda name: f'{name} Created',
+        value_fn=lambda x, user: user.created if user else None,
+        icon="mdi:account",
+    ),
+    CraftySensorEntityDescription(
+        key="user_last_login",
+        kind="user",
+        family=FAMILY_USER_ACTIVITY,
+        object_id="User Last login",
+        name_fn=lambda name: f'{name} Last login',
+        value_fn=lambda x, user: user.last_login if user else None,
+        icon="mdi:login",
+    ),
+    CraftySensorEntityDescription(
+        key="user_last_update",
+        kind="user",
+        family=FAMILY_USER_ACTIVITY,
+        object_id="User Last update",
+        name_fn=lambda name: f'{name} Last update',
+        value_fn=lambda x, user: user.last_update if user else None,
+        icon="mdi:update",
+    ),
+    CraftySensorEntityDescription(
+        key="user_last_ip",
+        kind="user",
+        family=FAMILY_USER_IP,
+        object_id="User Last IP",
+        name_fn=lambda name: f'{name} Last IP',
+        value_fn=lambda x, user: user.last_ip if user else None,
+        icon="mdi:ip",
+    ),
+    CraftySensorEntityDescription(
+        key="user_email",
+        kind="user",
+        family=FAMILY_USER_EMAIL,
+        object_id="User Email",
+        name_fn=lambda name: f'{name} Email',
+        value_fn=lambda x, user: user.email if user else None,
+        icon="mdi:email",
+    ),
+    CraftySensorEntityDescription(
+        key="user_enabled",
+        kind="user",
+        family=FAMILY_USER_ACCOUNT,
+        object_id="User Enabled",
+        name_fn=lambda name: f'{name} Enabled',
+        value_fn=lambda x, user: user.enabled if user else False,
+        icon_fn=lambda x, user: "mdi:account-check" if user and user.enabled else "mdi:account-cancel",
+    ),
+    CraftySensorEntityDescription(
+        key="user_superuser",
+        kind="user",
+        family=FAMILY_USER_ACCOUNT,
+        object_id="User Superuser",
+        name_fn=lambda name: f'{name} Superuser',
+        value_fn=lambda x, user: user.superuser if user else False,
+        icon="mdi:account-supervisor",
+    ),
+    CraftySensorEntityDescription(
+        key="user_roles",
+        kind="user",
+        family=FAMILY_USER_ACCOUNT,
+        object_id="User Roles",
+        name_fn=lambda name: f'{name} Roles',
+        value_fn=lambda x, user: len(user.roles) if user else 0,
+        attrs_fn=lambda x, user: {"Roles": [x.role_name(role_id) for role_id in (user.roles if user else [])]},
+        compact_attrs_fn=lambda x, user: {"role_ids": list(user.roles if user else [])},
+        icon="mdi:account-supervisor",
+    ),
+]
 
+SENSORS = {
+    "server": SERVER_SENSORS,
+    "role": ROLE_SENSORS,
+    "user": USER_SENSORS,
+}
+
+@dataclass(frozen=True, kw_only=True)
+class CraftyRefreshSensorEntityDescription(SensorEntityDescription):
+    """A sensor on how the refreshes of one tier ("metadata" or "stats") went, the functions get its coordinator."""
+    tier: str
+    value_fn: Callable[[CraftyCoordinator], Any]
+    attrs_fn: Callable[[CraftyCoordinator], Dict[str, Any]] | None = None
+    entity_category: EntityCategory | None = EntityCategory.DIAGNOSTIC
+    entity_registry_enabled_default: bool = False
+
+def last_refresh(attribute: str, scale: float = 1) -> Callable[[CraftyCoordinator], Any]:
+    def value(coordinator: CraftyCoordinator) -> Any:
+        refresh = coordinator.refreshes.last
+        return None if refresh is None else round(getattr(refresh, attribute) * scale, 3)
+
+    return value
+
+def last_refresh_attrs(coordinator: CraftyCoordinator) -> Dict[str, Any]:
+    refresh = coordinator.refreshes.last
+    return {} if refresh is None else refresh.as_dict()
+
+REFRESH_SENSORS = [
+    CraftyRefreshSensorEntityDescription(
+        key="metadata_refresh_duration",
+        tier="metadata",
+        name="Metadata refresh duration",
+        value_fn=last_refresh("duration"),
+        attrs_fn=last_refresh_attrs,
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    CraftyRefreshSensorEntityDescription(
+        key="stats_refresh_duration",
+        tier="stats",
+        name="Stats refresh duration",
+        value_fn=last_refresh("duration"),
+        attrs_fn=last_refresh_attrs,
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    CraftyRefreshSensorEntityDescription(
+        key="metadata_refresh_calls",
+        tier="metadata",
+        name="Metadata refresh API calls",
+        value_fn=last_refresh("calls"),
+        icon="mdi:api",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    CraftyRefreshSensorEntityDescription(
+        key="stats_refresh_calls",
+        tier="stats",
+        name="Stats refresh API calls",
+        value_fn=last_refresh("calls"),
+        icon="mdi:api",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    CraftyRefreshSensorEntityDescription(
+        key="api_latency_p95",
+        # Updated as often as the stats, the latencies cover the requests of both tiers
+        tier="stats",
+        name="API latency p95",
+        value_fn=lambda coordinator: None if (latency := coordinator.client.metrics.latency(0.95)) is None else round(latency * 1000, 1),
+        attrs_fn=lambda coordinator: {name: metrics["latency_ms"]["p95"] for name, metrics in coordinator.client.metrics.as_dict().items()},
+        icon="mdi:timer-sand",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+]
 
+@callback
+def async_migrate_suggested_units(hass: HomeAssistant, config_entry: ConfigEntry, names: CraftyEntryNames, ids: set[Any]) -> None:
+    """Pin the suggested unit of sensors registered before they reported native values.
+
+    Home Assistant only stores a suggested unit when an entity is registered, the memory and world size sensors
+    of existing installs would otherwise show bytes, or be converted into whatever unit they happened to show last.
+    """
+    registry = er.async_get(hass)
+    for description in SERVER_SENSORS:
+        if description.suggested_unit_of_measurement is None:
+            continue
+        for id in ids:
+            entity_id = registry.async_get_entity_id("sensor", DOMAIN, f'{names.unique_id}_{description.key}_{id}')
+            if entity_id is None or "sensor.private" in registry.async_get(entity_id).options:
+                continue
+            _LOGGER.debug("Showing %s in %s", entity_id, description.suggested_unit_of_measurement)
+            registry.async_update_entity_options(entity_id, "sensor.private", {"suggested_unit_of_measurement": description.suggested_unit_of_measurement})
 
-class CraftyNumbersUsersSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, type: bool = False):
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: Callable,
+) -> None:
+    data: CraftyEntryData = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = data.coordinator
+    stats_coordinator = data.stats_coordinator
+    selection = data.selection
+    names = data.names
+    max_quiet_time = timedelta(seconds=entry_option(config_entry, CONF_MAX_QUIET_TIME, DEFAULT_MAX_QUIET_TIME))
+    compact = entry_option(config_entry, CONF_COMPACT_ATTRIBUTES, DEFAULT_COMPACT_ATTRIBUTES)
+    coordinators = {"server": stats_coordinator, "role": coordinator, "user": coordinator}
+    included = {"server": selection.server, "role": selection.role, "user": selection.user}
+
+    def sensors(kind: str) -> Callable[[Any], list[CraftySensorEntity]]:
+        descriptions = [description for description in SENSORS[kind] if selection.has(description.family)]
+
+        def build(id: Any) -> list[CraftySensorEntity]:
+            if not included[kind](id):
+                return []
+            entities = [CraftySensor(coordinators[kind], config_entry, names, description, id, max_quiet_time, compact) for description in descriptions]
+            if kind == "server" and selection.has(FAMILY_SERVER_BUTTONS):
+                entities.append(CraftyServerActionSensor(stats_coordinator, config_entry, names, data.actions, id))
+            return entities
+
+        return build
+
+    async_migrate_suggested_units(hass, config_entry, names, stats_coordinator.data.ids("server"))
+    async_add_entities([
+        CraftySensor(coordinators[description.kind], config_entry, names, description)
+        for description in TOTAL_SENSORS
+        if description.family is None or selection.has(description.family)
+    ])
+    tiers = {"metadata": coordinator, "stats": stats_coordinator}
+    async_add_entities([CraftyRefreshSensor(tiers[description.tier], config_entry, names, description) for description in REFRESH_SENSORS])
+
+    # Servers, roles and users come and go without reloading the entry
+    async_track_items(hass, config_entry, stats_coordinator, async_add_entities, {"server": sensors("server")})
+    async_track_items(hass, config_entry, coordinator, async_add_entities, {"role": sensors("role"), "user": sensors("user")})
+
+class CraftySensor(CraftySensorEntity):
+    entity_description: CraftySensorEntityDescription
+    # Name lists and compact permissions grow with the number of servers, roles and users, keep them out of the recorder
+    _unrecorded_attributes = frozenset({"Users", "Roles", "user_ids", "role_ids", "permissions"})
+
+    def __init__(self, coordinator: CraftyCoordinator, config_entry: ConfigEntry, names: CraftyEntryNames, description: CraftySensorEntityDescription, id: Any = None, max_quiet_time: timedelta = timedelta(), compact: bool = False):
+        super().__init__(coordinator, config_entry, None if id is None else (description.kind, id))
+        self.entity_description = description
+        self._max_quiet_time = max_quiet_time
+        self._written_at = dt_util.utcnow()
+        self._unsub_quiet: CALLBACK_TYPE | None = None
+        kind = description.kind
+
+        if id is None:
+            self._name = description.name
+            self._device_name = names.group_name[kind]
+            self._model = names.group_model[kind]
+            self._unique_id = f'{names.unique_id}_{description.key}'
+            self._entry_type = DeviceEntryType.SERVICE
+        else:
+            self._name = lambda x: description.name_fn(x.name(kind, id))
+            self._device_name = coordinator.data.name(kind, id)
+            self._model = names.model[kind]
+            self._unique_id = f'{names.unique_id}_{description.key}_{id}'
+            self._via_device = names.via_device[kind]
+        if description.object_id is not None:
+            self.entity_id = names.object_id("sensor", description.object_id if id is None else f'{description.object_id} {id}')
+
+        if description.suggested_unit_of_measurement is not None:
+            self._native_value = lambda x: description.value_fn(x, x.item(kind, id))
+        else:
+            self._state = lambda x: description.value_fn(x, x.item(kind, id))
+        if description.icon_fn is not None:
+            self._icon = lambda x: description.icon_fn(x, x.item(kind, id))
+        else:
+            self._icon = description.icon
+        self._unit = description.native_unit_of_measurement
+        attrs_fn = description.compact_attrs_fn if compact and description.compact_attrs_fn else description.attrs_fn
+        if attrs_fn is not None:
+            self._attrs = lambda x: attrs_fn(x, x.item(kind, id))
+        self._attr_entity_category = description.entity_category
+
+    async def async_will_remove_from_hass(self) -> None:
+        self._cancel_quiet()
+        await super().async_will_remove_from_hass()
+
+    def _cancel_quiet(self) -> None:
+        if self._unsub_quiet is not None:
+            self._unsub_quiet()
+            self._unsub_quiet = None
+
+    @callback
+    def _async_quiet_over(self, _now) -> None:
+        self._unsub_quiet = None
+        written_state = self._current_state()
+        if written_state == self._written_state:
+            return
+        self._written_state = written_state
+        self._written_at = dt_util.utcnow()
+        self.async_write_ha_state()
+
+    def _significant(self, written_state: tuple) -> bool:
+        now = dt_util.utcnow()
+        if self._within_deadband(written_state) and now - self._written_at < self._max_quiet_time:
+            # The value may settle here, write it once the quiet time is over even without another update
+            if self._unsub_quiet is None:
+                self._unsub_quiet = async_call_later(self.hass, self._max_quiet_time - (now - self._written_at), self._async_quiet_over)
+            return False
+        if not super()._significant(written_state):
+            return False
+        self._cancel_quiet()
+        self._written_at = now
+        return True
+
+    def _within_deadband(self, written_state: tuple) -> bool:
+        """Whether only the numeric state changed, and by less than the deadband of the description."""
+        description = self.entity_description
+        previous = self._written_state
+        if previous is None or not (description.deadband or description.relative_deadband):
+            return False
+        state, last = written_state[2], previous[2]
+        if written_state[:2] + written_state[3:] != previous[:2] + previous[3:] or not isinstance(state, (int, float)) or not isinstance(last, (int, float)):
+            return False
+        # Compared with the last written state, so slow drifts add up until they are written
+        change = abs(state - last)
+        return change <= description.deadband or change <= description.relative_deadband * abs(last)
+
+class CraftyRefreshSensor(CraftySensorEntity):
+    entity_description: CraftyRefreshSensorEntityDescription
+
+    def __init__(self, coordinator: CraftyCoordinator, config_entry: ConfigEntry, names: CraftyEntryNames, description: CraftyRefreshSensorEntityDescription):
         super().__init__(coordinator, config_entry)
-        
-        self._name = "Users"
-        self._device_name = "All Users"
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Users'
-        self._state = lambda x: len(x.get("users", []))
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_users'
-        self._icon = "mdi:account-group"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        self.state_class = SensorStateClass.MEASUREMENT
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller Roles'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
+        self.entity_description = description
 
+        self._name = description.name
+        self._device_name = names.group_name["server"]
+        self._model = names.group_model["server"]
+        self._unique_id = f'{names.unique_id}_{description.key}'
         self._entry_type = DeviceEntryType.SERVICE
-
-class CraftyUserCreatedSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, user_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("users"), "user_id", user_id).get("username", user_id) if find_dict(x.get("users"), "user_id", user_id) else user_id} Created'
-        self._device_name = find_dict(self._coordinator.data.get("users"), "user_id", user_id).get("username", user_id) if find_dict(self._coordinator.data.get("users"), "user_id", user_id) else user_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}User'
-        self._state = lambda x: find_dict(x.get("users"), "user_id", user_id).get("created") if find_dict(x.get("users"), "user_id", user_id) else None
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_user_{user_id}'
-        self._unit = None
-        self._icon = "mdi:account"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller User {user_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Users"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Users'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyUserLoginSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, user_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("users"), "user_id", user_id).get("username", user_id) if find_dict(x.get("users"), "user_id", user_id) else user_id} Last login'
-        self._device_name = find_dict(self._coordinator.data.get("users"), "user_id", user_id).get("username", user_id) if find_dict(self._coordinator.data.get("users"), "user_id", user_id) else user_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}User'
-        self._state: datetime = lambda x: find_dict(x.get("users"), "user_id", user_id).get("last_login") if find_dict(x.get("users"), "user_id", user_id) else None
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_user_last_login_{user_id}'
-        self._icon = "mdi:login"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller User Last login {user_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Users"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Users'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyUserUpdateSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, user_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("users"), "user_id", user_id).get("username", user_id) if find_dict(x.get("users"), "user_id", user_id) else user_id} Last update'
-        self._device_name = find_dict(self._coordinator.data.get("users"), "user_id", user_id).get("username", user_id) if find_dict(self._coordinator.data.get("users"), "user_id", user_id) else user_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}User'
-        self._state: datetime = lambda x: find_dict(x.get("users"), "user_id", user_id).get("last_update") if find_dict(x.get("users"), "user_id", user_id) else None
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_user_last_update_{user_id}'
-        self._icon = "mdi:update"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller User Last update {user_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Users"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Users'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-        
-class CraftyUserIPSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, user_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("users"), "user_id", user_id).get("username", user_id) if find_dict(x.get("users"), "user_id", user_id) else user_id} Last IP'
-        self._device_name = find_dict(self._coordinator.data.get("users"), "user_id", user_id).get("username", user_id) if find_dict(self._coordinator.data.get("users"), "user_id", user_id) else user_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}User'
-        self._state = lambda x: find_dict(x.get("users"), "user_id", user_id).get("last_ip") if find_dict(x.get("users"), "user_id", user_id) else None
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_user_last_ip_{user_id}'
-        self._icon = "mdi:ip"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller User Last IP {user_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Users"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Users'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-                
-class CraftyUserEmailSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, user_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("users"), "user_id", user_id).get("username", user_id) if find_dict(x.get("users"), "user_id", user_id) else user_id} Email'
-        self._device_name = find_dict(self._coordinator.data.get("users"), "user_id", user_id).get("username", user_id) if find_dict(self._coordinator.data.get("users"), "user_id", user_id) else user_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}User'
-        self._state = lambda x: find_dict(x.get("users"), "user_id", user_id).get("email") if find_dict(x.get("users"), "user_id", user_id) else None
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_user_email_{user_id}'
-        self._icon = "mdi:email"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller User Email {user_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Users"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Users'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-                
-class CraftyUserEnabledSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, user_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("users"), "user_id", user_id).get("username", user_id) if find_dict(x.get("users"), "user_id", user_id) else user_id} Enabled'
-        self._device_name = find_dict(self._coordinator.data.get("users"), "user_id", user_id).get("username", user_id) if find_dict(self._coordinator.data.get("users"), "user_id", user_id) else user_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}User'
-        self._state: bool = lambda x: find_dict(x.get("users"), "user_id", user_id).get("enabled") if find_dict(x.get("users"), "user_id", user_id) else False
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_user_enabled_{user_id}'
-        self._icon = lambda x: "mdi:account-check" if (find_dict(x.get("users"), "user_id", user_id).get("enabled") if find_dict(x.get("users"), "user_id", user_id) else False) else "mdi:account-cancel"
+        self.entity_id = names.object_id("sensor", description.name)
+        self._state = lambda x: description.value_fn(coordinator)
+        self._icon = description.icon
+        self._unit = description.native_unit_of_measurement
+        if description.attrs_fn is not None:
+            self._attrs = lambda x: description.attrs_fn(coordinator)
+        self._attr_entity_category = description.entity_category
+        self._values_refresh = None
+
+    def _update_values(self) -> None:
+        # A failed refresh keeps the data, the values still have to follow it
+        if self._coordinator.refreshes.last is not self._values_refresh:
+            self._values_refresh = self._coordinator.refreshes.last
+            self._values_data = None
+        super()._update_values()
+
+    @property
+    def available(self) -> bool:
+        # A failed refresh is what these sensors are there to show
+        return self._coordinator.data is not None
+
+class CraftyServerActionSensor(CraftySensorEntity):
+    """The action a server is running, idle without one, with the actions queued behind it."""
+
+    def __init__(self, coordinator: CraftyCoordinator, config_entry: ConfigEntry, names: CraftyEntryNames, actions: CraftyActionQueue, server_id: str):
+        super().__init__(coordinator, config_entry, ("server", server_id))
+        self._actions = actions
+        self._server_id = server_id
+
+        self._name = lambda x: f'{x.name("server", server_id)} action'
+        self._device_name = coordinator.data.name("server", server_id)
+        self._model = names.model["server"]
+        self._unique_id = f'{names.unique_id}_server_action_{server_id}'
+        self._via_device = names.via_device["server"]
+        self.entity_id = names.object_id("sensor", f'Server Action {server_id}')
+        self._state = lambda x: action.value if (action := actions.in_flight(server_id)) else "idle"
+        self._icon = "mdi:playlist-play"
+        self._attrs = lambda x: self._queue_attrs()
         self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller User Enabled {user_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Users"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Users'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-                        
-class CraftyUserSuperSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, user_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("users"), "user_id", user_id).get("username", user_id) if find_dict(x.get("users"), "user_id", user_id) else user_id} Superuser'
-        self._device_name = find_dict(self._coordinator.data.get("users"), "user_id", user_id).get("username", user_id) if find_dict(self._coordinator.data.get("users"), "user_id", user_id) else user_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}User'
-        self._state: bool = lambda x: find_dict(x.get("users"), "user_id", user_id).get("superuser") if find_dict(x.get("users"), "user_id", user_id) else False
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_user_superuser_{user_id}'
-        self._icon = "mdi:account-supervisor"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller User Superuser {user_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Users"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Users'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyUserRolesSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, user_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("users"), "user_id", user_id).get("username", user_id) if find_dict(x.get("users"), "user_id", user_id) else user_id} Roles'
-        self._device_name = find_dict(self._coordinator.data.get("users"), "user_id", user_id).get("username", user_id) if find_dict(self._coordinator.data.get("users"), "user_id", user_id) else user_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}User'
-        self._state = lambda x: len(find_dict(x.get("users"), "user_id", user_id).get("roles") if find_dict(x.get("users"), "user_id", user_id) else [])
-        self._attrs = lambda x: {"Roles": [find_role(x.get("roles"), role.get("role_id")) for role in (find_dict(x.get("users"), "user_id", user_id).get("roles") if find_dict(x.get("users"), "user_id", user_id) else [])]}
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_user_roles_{user_id}'
-        self._icon = "mdi:account-supervisor"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller User Roles {user_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Users"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Users'
-
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
-
-class CraftyUserPictureSensor(CraftySensorEntity):
-    def __init__(self, coordinator: CraftyDataCoordinator, config_entry: ConfigEntry, user_id: int):
-        super().__init__(coordinator, config_entry)
-        
-        self._name = lambda x: f'{find_dict(x.get("users"), "user_id", user_id).get("username", user_id) if find_dict(x.get("users"), "user_id", user_id) else user_id} Picture'
-        self._device_name = find_dict(self._coordinator.data.get("users"), "user_id", user_id).get("username", user_id) if find_dict(self._coordinator.data.get("users"), "user_id", user_id) else user_id
-        self._model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}User'
-        self._state = lambda x: find_dict(x.get("users"), "user_id", user_id).get("picture") if find_dict(x.get("users"), "user_id", user_id) else None
-        self._unique_id = f'{self._host}_{self._port}_Crafty_Controller_user_picture_{user_id}'
-        self._icon = "mdi:badge-account-horizontal"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        id = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Crafty Controller User Picture {user_id}'
-        self.entity_id = f'sensor.{id}'.lower().replace(" ", "_")
-
-        via_device_name = "All Users"
-        via_device_model = f'{config_entry.data[CONF_NAME].capitalize() + " " if len(config_entry.data[CONF_NAME]) > 0 else ""}Users'
 
-        self._via_device = f'{self._host}_{self._port}_Crafty_Controller_{via_device_name}_{via_device_model}'
+    def _queue_attrs(self) -> Dict[str, Any]:
+        pending = self._actions.pending(self._server_id)
+        last = self._actions.last_result(self._server_id)
+        return {
+            "queue_depth": len(pending),
+            "queued": [action.value for action in pending],
+            "last_action": last.action.value if last else None,
+            "last_result": last.result if last else None,
+            "last_duration": round(last.duration, 1) if last else None,
+        }
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._actions.async_add_listener(self._server_id, self._handle_queue_update))
+
+    @callback
+    def _handle_queue_update(self) -> None:
+        # The queue is not part of the coordinator data, evaluate again for the same snapshot
+        self._values_data = None
+        self._handle_coordinator_update()
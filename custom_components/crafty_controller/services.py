@@ -0,0 +1,161 @@
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from crafty_controller_api import ServerActions
+
+from .actions import ACTION_TARGETS, async_server_action_waves
+from .const import DOMAIN
+from .coordinator import FOLLOW_TIMEOUT, CraftyEntryData
+from .models import decode_permissions
+from .profiler import SORT_KEYS, async_profile
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_CONFIG_ENTRY = "config_entry"
+ATTR_ROLE_ID = "role_id"
+ATTR_REFRESHES = "refreshes"
+ATTR_TIER = "tier"
+ATTR_MEMORY = "memory"
+ATTR_TOP = "top"
+ATTR_SORT = "sort"
+ATTR_ACTION = "action"
+ATTR_SERVER_ID = "server_id"
+ATTR_SERVERS = "servers"
+ATTR_CONCURRENCY = "concurrency"
+ATTR_WAVE_SIZE = "wave_size"
+ATTR_WAVE_DELAY = "wave_delay"
+ATTR_WAIT = "wait"
+ATTR_TIMEOUT = "timeout"
+
+SERVICE_GET_ROLE_PERMISSIONS = "get_role_permissions"
+SERVICE_PROFILE = "profile"
+SERVICE_SERVER_ACTION = "server_action"
+
+TIERS = ["metadata", "stats", "both"]
+SERVER_SELECTORS = {
+    "all": lambda server: True,
+    "running": lambda server: server.running,
+    "stopped": lambda server: not server.running,
+}
+
+GET_ROLE_PERMISSIONS_SCHEMA = vol.Schema({
+    vol.Required(ATTR_CONFIG_ENTRY): cv.string,
+    vol.Optional(ATTR_ROLE_ID): vol.Coerce(int),
+})
+
+PROFILE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_CONFIG_ENTRY): cv.string,
+    vol.Optional(ATTR_REFRESHES, default=1): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+    vol.Optional(ATTR_TIER, default="both"): vol.In(TIERS),
+    vol.Optional(ATTR_MEMORY, default=False): cv.boolean,
+    vol.Optional(ATTR_TOP, default=15): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+    vol.Optional(ATTR_SORT, default="tottime"): vol.In(list(SORT_KEYS)),
+})
+
+SERVER_ACTION_SCHEMA = vol.Schema({
+    vol.Required(ATTR_CONFIG_ENTRY): cv.string,
+    vol.Required(ATTR_ACTION): vol.In([action.value for action in ACTION_TARGETS]),
+    vol.Optional(ATTR_SERVER_ID): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_SERVERS): vol.In(list(SERVER_SELECTORS)),
+    vol.Optional(ATTR_CONCURRENCY, default=1): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+    vol.Optional(ATTR_WAVE_SIZE, default=5): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
+    vol.Optional(ATTR_WAVE_DELAY, default=0): vol.All(vol.Coerce(float), vol.Range(min=0, max=3600)),
+    vol.Optional(ATTR_WAIT, default=True): cv.boolean,
+    vol.Optional(ATTR_TIMEOUT, default=FOLLOW_TIMEOUT): vol.All(vol.Coerce(float), vol.Range(min=1, max=3600)),
+})
+
+def entry_data(hass: HomeAssistant, entry_id: str) -> CraftyEntryData:
+    entry = hass.config_entries.async_get_entry(entry_id)
+    if entry is None or entry.domain != DOMAIN or entry.state != ConfigEntryState.LOADED:
+        raise ServiceValidationError(f'{entry_id} is not a loaded Crafty Controller entry')
+    return hass.data[DOMAIN][entry_id]
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    async def async_get_role_permissions(call: ServiceCall) -> ServiceResponse:
+        """Decode the permission bitmasks of one or every role, they are only kept compact on the entities."""
+        data = entry_data(hass, call.data[ATTR_CONFIG_ENTRY])
+        snapshot = data.coordinator.data
+        roles = snapshot.roles
+        if ATTR_ROLE_ID in call.data:
+            if (role := snapshot.role(call.data[ATTR_ROLE_ID])) is None:
+                raise ServiceValidationError(f'Unknown role {call.data[ATTR_ROLE_ID]}')
+            roles = [role]
+        return {
+            "roles": [
+                {
+                    "role_id": role.role_id,
+                    "role_name": role.role_name,
+                    "servers": [
+                        {"server_id": server_id, "server_name": snapshot.server_name(server_id), "permissions": decode_permissions(mask)}
+                        for server_id, mask in role.servers
+                    ],
+                }
+                for role in roles
+            ]
+        }
+
+    async def async_profile_refreshes(call: ServiceCall) -> ServiceResponse:
+        """Profile the next refreshes of an entry, writing pstats (and tracemalloc) files to the config directory."""
+        data = entry_data(hass, call.data[ATTR_CONFIG_ENTRY])
+        tier = call.data[ATTR_TIER]
+        coordinators = [data.coordinator] if tier == "metadata" else [data.stats_coordinator] if tier == "stats" else [data.coordinator, data.stats_coordinator]
+        return await async_profile(hass, coordinators, call.data[ATTR_REFRESHES], call.data[ATTR_MEMORY], call.data[ATTR_TOP], call.data[ATTR_SORT])
+
+    async def async_bulk_server_action(call: ServiceCall) -> ServiceResponse:
+        """Run an action on the listed servers and/or every running, stopped or known server, in waves."""
+        data = entry_data(hass, call.data[ATTR_CONFIG_ENTRY])
+        snapshot = data.stats_coordinator.data
+        if ATTR_SERVER_ID not in call.data and ATTR_SERVERS not in call.data:
+            raise ServiceValidationError(f'Select servers with {ATTR_SERVER_ID} or {ATTR_SERVERS}')
+        # Compared as strings, as the exclusions are, older Crafty versions report integer server ids
+        known = {str(server.server_id): server.server_id for server in snapshot.servers}
+        requested = list(dict.fromkeys(str(id) for id in call.data.get(ATTR_SERVER_ID, [])))
+        if unknown := [id for id in requested if id not in known]:
+            raise ServiceValidationError(f'Unknown servers {", ".join(unknown)}')
+        server_ids = [known[id] for id in requested]
+        if ATTR_SERVERS in call.data:
+            selector = SERVER_SELECTORS[call.data[ATTR_SERVERS]]
+            server_ids.extend(server.server_id for server in snapshot.servers if selector(server) and server.server_id not in server_ids)
+
+        results = await async_server_action_waves(
+            data,
+            server_ids,
+            ServerActions(call.data[ATTR_ACTION]),
+            call.data[ATTR_CONCURRENCY],
+            call.data[ATTR_WAVE_SIZE],
+            call.data[ATTR_WAVE_DELAY],
+            call.data[ATTR_WAIT],
+            call.data[ATTR_TIMEOUT],
+        )
+        return {
+            "action": call.data[ATTR_ACTION],
+            "results": [{**result.as_dict(), "server_name": snapshot.server_name(result.server_id)} for result in results],
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_ROLE_PERMISSIONS,
+        async_get_role_permissions,
+        schema=GET_ROLE_PERMISSIONS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile_refreshes,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SERVER_ACTION,
+        async_bulk_server_action,
+        schema=SERVER_ACTION_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
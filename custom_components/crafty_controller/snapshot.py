@@ -0,0 +1,47 @@
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .coordinator import CraftyDataCoordinator, CraftyStatsCoordinator
+from .models import CraftySnapshot
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 30
+
+class CraftySnapshotStore():
+    """Last good snapshots of both tiers, used to set up entities before Crafty answers."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, f'{DOMAIN}.{entry_id}.snapshot')
+
+    async def async_load(self) -> tuple[CraftySnapshot | None, CraftySnapshot | None]:
+        """Return the restored (metadata, stats) snapshots, (None, None) when nothing usable is stored."""
+        data = await self._store.async_load()
+        if not data:
+            return (None, None)
+        try:
+            return (CraftySnapshot.from_dict(data["metadata"]), CraftySnapshot.from_dict(data["stats"]))
+        except Exception as err:
+            _LOGGER.warning("Ignoring stored Crafty snapshot: %s", err)
+            return (None, None)
+
+    @callback
+    def async_schedule_save(self, coordinator: CraftyDataCoordinator, stats_coordinator: CraftyStatsCoordinator) -> None:
+        """Save both tiers as they are when the delayed write happens, so the stats are as recent as possible."""
+        if not coordinator.last_update_success or coordinator.data is None or coordinator.data.restored:
+            return
+        self._store.async_delay_save(
+            lambda: {
+                "metadata": coordinator.data.as_dict(),
+                "stats": (stats_coordinator.data or coordinator.data).as_dict(),
+            },
+            SAVE_DELAY,
+        )
+
+async def async_remove_snapshot(hass: HomeAssistant, entry_id: str) -> None:
+    await Store(hass, STORAGE_VERSION, f'{DOMAIN}.{entry_id}.snapshot').async_remove()
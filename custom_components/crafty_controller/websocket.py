@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any
+
+from aiohttp import ClientError, WSMsgType, WSServerHandshakeError
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util.json import json_loads
+
+from crafty_controller_api import FailedToLogin
+
+from .api import CraftyClient
+from .coordinator import CraftyStatsCoordinator
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+RECONNECT_INITIAL_DELAY = 1
+RECONNECT_MAX_DELAY = 300
+
+class CraftyWebsocket():
+    """The dashboard websocket of a Crafty instance, feeding pushed server stats into the stats tier."""
+
+    def __init__(self, hass: HomeAssistant, client: CraftyClient, coordinator: CraftyStatsCoordinator) -> None:
+        self._hass = hass
+        self._client = client
+        self._coordinator = coordinator
+        self.messages = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._coordinator.push
+
+    async def async_run(self) -> None:
+        """Stay connected until cancelled, polling takes over while the socket is down."""
+        delay = RECONNECT_INITIAL_DELAY
+        while True:
+            token = self._client.token
+            try:
+                async with self._client.websocket() as ws:
+                    _LOGGER.debug("Connected to the websocket of %s", self._client.base_url)
+                    self._coordinator.async_set_push(True)
+                    delay = RECONNECT_INITIAL_DELAY
+                    async for message in ws:
+                        if message.type == WSMsgType.TEXT:
+                            self._handle_message(message.data)
+                        elif message.type in (WSMsgType.CLOSE, WSMsgType.CLOSED, WSMsgType.ERROR):
+                            break
+            except WSServerHandshakeError as err:
+                _LOGGER.debug("Websocket of %s refused the connection: %s", self._client.base_url, err)
+                # Shares the lock and cooldown of the API requests, a refused reconnect loop can't log in over and over
+                try:
+                    if err.status in (401, 403) and not await self._client.renew_token(token):
+                        _LOGGER.debug("Token of %s was not renewed", self._client.base_url)
+                except FailedToLogin:
+                    # The next refresh of the coordinators raises it and asks for new credentials
+                    _LOGGER.debug("Crafty at %s refused the credentials", self._client.base_url)
+            except (ClientError, TimeoutError) as err:
+                _LOGGER.debug("Websocket of %s failed: %s", self._client.base_url, err)
+
+            if self._coordinator.push:
+                _LOGGER.debug("Websocket of %s disconnected, falling back to polling", self._client.base_url)
+                self._coordinator.async_set_push(False)
+                await self._coordinator.async_request_refresh()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def _handle_message(self, data: str) -> None:
+        try:
+            message = json_loads(data)
+        except ValueError:
+            return
+        if not isinstance(message, dict):
+            return
+        event = message.get("event")
+        payload = message.get("data")
+
+        stats: dict[str, dict[str, Any]] = {}
+        if event == "update_server_status" and isinstance(payload, list):
+            stats = {item["id"]: item for item in payload if isinstance(item, dict) and "id" in item}
+        elif event == "update_server_details" and isinstance(payload, dict) and "id" in payload:
+            stats = {payload["id"]: payload}
+        if stats:
+            self.messages += 1
+            self._coordinator.async_set_servers(stats)